@@ -2,7 +2,23 @@
 
 __version__ = "0.1.0"
 
-from glyconutri.cgm import load_cgm_data, calculate_tir, calculate_gv
-from glyconutri.food import get_gi, calculate_gl
-from glyconutri.analysis import analyze_glucose
-from glyconutri.report import generate_report
+import importlib
+
+# 公开接口按需加载：cgm/analysis/report 依赖 pandas，导入 glyconutri.web 等子模块时无需提前加载
+_EXPORTS = {
+    "load_cgm_data": "glyconutri.cgm",
+    "calculate_tir": "glyconutri.cgm",
+    "calculate_gv": "glyconutri.cgm",
+    "get_gi": "glyconutri.food",
+    "calculate_gl": "glyconutri.food",
+    "analyze_glucose": "glyconutri.analysis",
+    "generate_report": "glyconutri.report",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
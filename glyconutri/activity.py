@@ -295,15 +295,19 @@ class SleepAnalysis:
         
         # Somogyi 效应 - 夜间低血糖后反跳性高血糖
         if results.get("low_episodes"):
-            # 找低血糖后的高血糖
-            for idx, row in low_readings.iterrows():
-                low_time = row['timestamp']
-                after_low = window[window['timestamp'] > low_time + timedelta(hours=2)]
-                if not after_low.empty and after_low['glucose'].max() > 180:
+            # 找低血糖 2 小时后的高血糖：按时间排序后取后缀最大值，
+            # 每个低血糖点二分查找其 2 小时之后的位置，不必逐点筛选整个窗口
+            ordered = window.sort_values('timestamp', kind='stable')
+            times = ordered['timestamp'].to_numpy()
+            suffix_max = np.fmax.accumulate(ordered['glucose'].to_numpy()[::-1])[::-1]
+            low_times = low_readings['timestamp']
+            after = np.searchsorted(times, (low_times + timedelta(hours=2)).to_numpy(), side='right')
+            for pos, i in enumerate(after):
+                if i < len(times) and suffix_max[i] > 180:
                     results["somogyi_effect"] = True
                     results["somogyi_detail"] = {
-                        "low_time": low_time.isoformat(),
-                        "rebound_high": after_low['glucose'].max()
+                        "low_time": low_times.iloc[pos].isoformat(),
+                        "rebound_high": suffix_max[i]
                     }
                     break
         
@@ -2,36 +2,70 @@
 数据分析模块
 """
 
+import hashlib
+import threading
 import pandas as pd
 import numpy as np
+from collections import OrderedDict
 from typing import Dict
-from glyconutri.cgm import calculate_tir, calculate_gv
+
+# analyze_glucose 结果缓存，按血糖序列的 blake2b 摘要索引；只存摘要和结果，不保留序列本身
+_RESULT_CACHE: "OrderedDict[bytes, Dict]" = OrderedDict()
+_RESULT_CACHE_SIZE = 256
+_RESULT_CACHE_LOCK = threading.Lock()
 
 
 def analyze_glucose(df: pd.DataFrame) -> Dict:
     """综合分析血糖数据"""
+    # 一次取出连续的 float64 数组，所有指标都是 NumPy 归约，避免逐列 Series 开销；
+    # 结果只取决于血糖序列，按其字节内容的摘要缓存，重复分析同一份数据直接命中
+    g = np.ascontiguousarray(df['glucose'].to_numpy(dtype=np.float64))
+    key = hashlib.blake2b(g, digest_size=16).digest()
+    with _RESULT_CACHE_LOCK:
+        results = _RESULT_CACHE.get(key)
+        if results is not None:
+            _RESULT_CACHE.move_to_end(key)
+            return dict(results)
+    
+    results = _analyze_array(g)
+    with _RESULT_CACHE_LOCK:
+        _RESULT_CACHE[key] = results
+        if len(_RESULT_CACHE) > _RESULT_CACHE_SIZE:
+            _RESULT_CACHE.popitem(last=False)
+    return dict(results)
+
+
+def _analyze_array(g: np.ndarray) -> Dict:
+    valid = g[~np.isnan(g)]
+    n = g.size
     results = {}
     
-    # 基本统计
-    results['mean_glucose'] = df['glucose'].mean()
-    results['median_glucose'] = df['glucose'].median()
-    results['std_glucose'] = df['glucose'].std()
-    results['min_glucose'] = df['glucose'].min()
-    results['max_glucose'] = df['glucose'].max()
+    # 基本统计 (没有有效值时为 NaN，与 pandas 的 Series 统计一致；min/max 对空数组会报错)
+    if valid.size:
+        mean = valid.mean()
+        results['mean_glucose'] = mean
+        results['median_glucose'] = np.median(valid)
+        results['std_glucose'] = valid.std(ddof=1) if valid.size > 1 else np.nan
+        results['min_glucose'] = valid.min()
+        results['max_glucose'] = valid.max()
+    else:
+        mean = np.nan
+        for key in ('mean_glucose', 'median_glucose', 'std_glucose', 'min_glucose', 'max_glucose'):
+            results[key] = np.nan
     
-    # TIR 计算
-    results['tir'] = calculate_tir(df)
+    # TIR 计算 (与 calculate_tir 默认范围一致: 70-140)
+    results['tir'] = np.count_nonzero((g >= 70) & (g <= 140)) / n * 100 if n else 0
     
-    # 血糖波动
-    results['gv'] = calculate_gv(df)
+    # 血糖波动 (CV%)
+    results['gv'] = results['std_glucose'] / mean * 100 if mean > 0 else 0
     
     # 低血糖时间
-    results['time_below_70'] = (df['glucose'] < 70).sum() / len(df) * 100
-    results['time_below_54'] = (df['glucose'] < 54).sum() / len(df) * 100
+    results['time_below_70'] = np.count_nonzero(g < 70) / n * 100 if n else 0
+    results['time_below_54'] = np.count_nonzero(g < 54) / n * 100 if n else 0
     
     # 高血糖时间
-    results['time_above_180'] = (df['glucose'] > 180).sum() / len(df) * 100
-    results['time_above_250'] = (df['glucose'] > 250).sum() / len(df) * 100
+    results['time_above_180'] = np.count_nonzero(g > 180) / n * 100 if n else 0
+    results['time_above_250'] = np.count_nonzero(g > 250) / n * 100 if n else 0
     
     return results
 
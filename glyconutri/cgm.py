@@ -2,27 +2,33 @@
 CGM 数据处理模块
 """
 
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from typing import List, Dict, Optional
 
+from glyconutri.cgm_adapters import read_cgm_csv, parse_timestamps
+
 
 def load_cgm_data(filepath: str) -> pd.DataFrame:
     """加载 CGM 数据"""
     if filepath.endswith('.csv'):
-        df = pd.read_csv(filepath)
+        # 与上传接口共用读取器：装了 pyarrow 时走其多线程解析，否则 C 引擎
+        with open(filepath, encoding='utf-8-sig') as f:
+            df = read_cgm_csv(f.read())
     elif filepath.endswith('.json'):
         df = pd.read_json(filepath)
     else:
         raise ValueError("不支持的文件格式，请使用 CSV 或 JSON")
     
     # 标准化列名
+    # 按首个时间字符串猜测格式后向量化解析，避免逐值推断
     if 'timestamp' in df.columns:
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df['timestamp'] = parse_timestamps(df['timestamp'])
     elif 'time' in df.columns:
-        df['timestamp'] = pd.to_datetime(df['time'])
+        df['timestamp'] = parse_timestamps(df['time'])
     elif 'date' in df.columns:
-        df['timestamp'] = pd.to_datetime(df['date'])
+        df['timestamp'] = parse_timestamps(df['date'])
     
     if 'glucose' in df.columns:
         df['glucose'] = pd.to_numeric(df['glucose'], errors='coerce')
@@ -37,7 +43,9 @@ def calculate_tir(df: pd.DataFrame, low: float = 70, high: float = 140) -> float
     if 'glucose' not in df.columns:
         raise ValueError("数据中缺少血糖列")
     
-    in_range = ((df['glucose'] >= low) & (df['glucose'] <= high)).sum()
+    # 在 numpy 数组上计数，避免逐个生成布尔 Series (趋势分析对每天、每个时段都会调用)
+    g = df['glucose'].to_numpy(dtype=np.float64, na_value=np.nan)
+    in_range = np.count_nonzero((g >= low) & (g <= high))
     total = len(df)
     return (in_range / total) * 100 if total > 0 else 0
 
@@ -47,8 +55,12 @@ def calculate_gv(df: pd.DataFrame) -> float:
     if 'glucose' not in df.columns:
         raise ValueError("数据中缺少血糖列")
     
-    mean = df['glucose'].mean()
-    std = df['glucose'].std()
+    g = df['glucose'].to_numpy(dtype=np.float64, na_value=np.nan)
+    g = g[~np.isnan(g)]
+    if g.size == 0:
+        return 0
+    mean = g.mean()
+    std = g.std(ddof=1) if g.size > 1 else np.nan  # 与 pandas 一致：样本标准差，单个值为 NaN
     return (std / mean) * 100 if mean > 0 else 0
 
 
@@ -2,10 +2,149 @@
 CGM 数据适配器 - 支持多种格式
 """
 
+import io
+import re
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from typing import Optional
 
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+# 文本超过此大小时才改用 polars (小文件上线程启动等固定开销占大头)
+POLARS_MIN_BYTES = 64 * 1024
+
+
+def sniff_delimiter(text: str, sample: int = 4096) -> str:
+    """按前 4KB 中制表符、逗号、分号、竖线的出现次数判断分隔符，都没有时按空白分隔"""
+    head = text[:sample]
+    counts = {d: head.count(d) for d in ('\t', ',', ';', '|')}
+    sep = max(counts, key=counts.get)
+    return sep if counts[sep] else r'\s+'
+
+
+def read_cgm_csv(text: str, sep: str = ',', **kwargs) -> pd.DataFrame:
+    """读取分隔符文本
+    
+    大文件且装了 polars (转 pandas 需要 pyarrow) 时优先用 polars 的多线程读取器 (只支持 header 参数，
+    列数不齐时 polars 报错，交给下面的引擎按 on_bad_lines 处理)；
+    否则安装了 pyarrow 时使用其多线程 CSV 解析器；它们拒绝的输入 (如列数不齐) 交给 C 引擎；
+    正则分隔符 (如 \\s+) 只有 C 引擎支持
+    """
+    # polars 与 pyarrow 读取器都读字节，只编码一次
+    data = text.encode() if pyarrow is not None and len(sep) == 1 else None
+    if (data is not None and pl is not None and len(data) > POLARS_MIN_BYTES
+            and set(kwargs) <= {'header', 'on_bad_lines'}):
+        no_header = kwargs.get('header', 'infer') is None
+        try:
+            df = pl.read_csv(data, separator=sep, has_header=not no_header).to_pandas()
+        except pl.exceptions.PolarsError:
+            pass
+        else:
+            if no_header:
+                df.columns = range(df.shape[1])
+            return df
+    if data is not None:
+        try:
+            return pd.read_csv(io.BytesIO(data), sep=sep, engine='pyarrow', **kwargs)
+        except ValueError:
+            pass
+    return pd.read_csv(io.StringIO(text), sep=sep, **kwargs)
+
+
+# 列名关键字 (列名先转小写)
+_TIME_COL_RE = re.compile(r'time|date|时间')
+_GLUCOSE_COL_RE = re.compile(r'glucose|value|sg|血糖')
+
+
+def find_cgm_columns(columns) -> tuple:
+    """按列名关键字找时间列和血糖列，找不到时分别取第一列和最后一列"""
+    columns = list(columns)
+    lowered = [str(c).lower() for c in columns]
+    time_col = next((c for c, l in zip(columns, lowered) if _TIME_COL_RE.search(l)), columns[0])
+    glucose_col = next((c for c, l in zip(columns, lowered) if _GLUCOSE_COL_RE.search(l)), columns[-1])
+    return time_col, glucose_col
+
+
+def finalize_cgm(timestamps, glucose) -> pd.DataFrame:
+    """mmol/L 换算、去掉缺失值并按时间排序，返回只含 timestamp/glucose 列的 DataFrame
+    
+    时间列为秒精度 datetime64[s]；血糖保持 float64 (或原整数类型)，不降为 float32/int16
+    
+    直接在 numpy 数组上完成，不产生中间 Series，也不重建索引
+    """
+    # ISO 8601 带 Z 或 +08:00 的时间先去掉时区、保留当地钟点 (按小时的分析都看钟点)，
+    # 否则 numpy 会把带时区的时间转成 object 数组或 UTC
+    if getattr(getattr(timestamps, 'dt', timestamps), 'tz', None) is not None:
+        timestamps = pd.DatetimeIndex(timestamps).tz_localize(None)
+    # CGM 时间不含亚秒部分，按秒精度存储 (pandas 默认为微秒)
+    ts = np.asarray(timestamps).astype('datetime64[s]', copy=False)
+    g = np.array(glucose)  # 复制一份，下面原地换算；整数列保持整数，与 pandas 行为一致
+    if g.dtype.kind not in 'iuf':
+        g = g.astype(float)
+    
+    # mmol/L 转 mg/dL (值 < 30 说明是 mmol/L)；fmax.reduce 一次遍历即跳过 NaN 求最大值，
+    # 不必先按掩码复制出非空值；全为 NaN 时结果为 NaN，比较为 False
+    if g.size and np.fmax.reduce(g) < 30:
+        np.multiply(g, 18, out=g)
+    
+    valid = ~np.isnat(ts)
+    if g.dtype.kind == 'f':
+        valid &= ~np.isnan(g)
+    ts, g = ts[valid], g[valid]
+    order = np.argsort(ts, kind='stable')
+    return pd.DataFrame({'timestamp': ts[order], 'glucose': g[order]})
+
+
+# 常见 CGM 导出时间格式，按字符串长度索引；{0} 为日期分隔符，{1} 为日期与时间之间的分隔符
+_TIME_FORMATS = {
+    10: '%Y{0}%m{0}%d',
+    16: '%Y{0}%m{0}%d{1}%H:%M',
+    19: '%Y{0}%m{0}%d{1}%H:%M:%S',
+}
+
+
+def sniff_time_format(sample) -> str:
+    """根据一个样本时间字符串猜测 strftime 格式，认不出时返回 None"""
+    if not isinstance(sample, str):
+        return None
+    sample = sample.strip()
+    template = _TIME_FORMATS.get(len(sample))
+    if template is None or sample[4:5] not in ('-', '/') or sample[7:8] != sample[4]:
+        return None
+    sep = sample[10:11] or ' '
+    if sep not in (' ', 'T'):
+        return None
+    return template.format(sample[4], sep)
+
+
+def parse_timestamps(values, fmt: str = None, errors: str = 'raise'):
+    """解析时间列
+    
+    未指定格式时按第一个时间字符串猜测格式，先按格式向量化解析 (比逐值推断快得多)，
+    格式不符时退回 pandas 自动推断
+    """
+    if fmt is None:
+        fmt = sniff_time_format(next((v for v in values if isinstance(v, str)), None))
+    if fmt is not None:
+        try:
+            return pd.to_datetime(values, format=fmt, cache=True)
+        except (ValueError, TypeError):
+            pass
+    return pd.to_datetime(values, errors=errors, cache=True)
+
+
+# WXQI 数据行: ID 日期 时间 记录类型 血糖 [其余列]；[^\S\n] 为换行以外的空白
+_WXQI_ROW_RE = re.compile(r'^[^\S\n]*\d+[^\S\n]+(\S+)[^\S\n]+(\S+)[^\S\n]+\S+[^\S\n]+(\S+)', re.M)
+
 
 def parse_wxqi_format(text: str) -> pd.DataFrame:
     """
@@ -14,40 +153,20 @@ def parse_wxqi_format(text: str) -> pd.DataFrame:
     格式: ID 日期 时间 记录类型 血糖(mmol/L)
     示例: 69137 2024/03/16 12:03 0 15.3
     """
-    lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
-    
-    # 跳过表头
-    data_lines = []
-    for line in lines:
-        # 检查是否是数据行 (第一列是数字)
-        parts = line.split()
-        if len(parts) >= 5 and parts[0].isdigit():
-            data_lines.append(line)
-    
-    if not data_lines:
+    # 一次正则扫描整段文本取出数据行 (第一列是数字且至少 5 列)，表头、注释行自然被跳过；
+    # parse_cgm_data 对每份上传都先尝试本格式，标准 CSV 在这里应尽快失败
+    rows = _WXQI_ROW_RE.findall(text)
+    if not rows:
         raise ValueError("No valid data found")
     
-    # 解析数据
-    data = []
-    for line in data_lines:
-        parts = line.split()
-        if len(parts) >= 5:
-            # WXQI格式: ID 日期 时间 记录类型 血糖
-            date_str = parts[1]  # 2024/03/16
-            time_str = parts[2]  # 12:03
-            glucose = float(parts[4])  # mmol/L
-            
-            timestamp = pd.to_datetime(f"{date_str} {time_str}")
-            
-            # 转换为 mg/dL
-            glucose_mgdl = glucose * 18
-            
-            data.append({
-                'timestamp': timestamp,
-                'glucose': glucose_mgdl
-            })
-    
-    df = pd.DataFrame(data)
+    # WXQI格式: ID 日期 时间 记录类型 血糖
+    times = [f"{d} {t}" for d, t, _ in rows]  # 2024/03/16 12:03
+    values = np.asarray([v for _, _, v in rows], dtype=float)  # mmol/L
+    
+    df = pd.DataFrame({
+        'timestamp': parse_timestamps(times, fmt='%Y/%m/%d %H:%M').as_unit('s'),  # 与 finalize_cgm 一致的秒精度
+        'glucose': values * 18  # 转换为 mg/dL
+    })
     return df.sort_values('timestamp')
 
 
@@ -57,56 +176,80 @@ def parse_standard_format(text: str) -> pd.DataFrame:
     支持: CSV, TSV, 空格分隔
     自动检测分隔符和列名
     """
-    lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
+    # 先做廉价的注释判断，每行只 strip 一次
+    lines = [s for l in text.split('\n') if not l.startswith('#') and (s := l.strip())]
     
     if not lines:
         raise ValueError("Empty data")
     
     # 检测分隔符
-    first_line = lines[0]
-    if '\t' in first_line:
-        sep = '\t'
-    elif ',' in first_line:
-        sep = ','
-    else:
-        sep = r'\s+'
+    sep = sniff_delimiter('\n'.join(lines))
     
     # 读取数据
-    import io
     try:
-        df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=sep)
+        df = read_cgm_csv('\n'.join(lines), sep=sep)
     except:
-        df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=sep, header=None)
+        df = read_cgm_csv('\n'.join(lines), sep=sep, header=None)
     
-    cols = df.columns.tolist()
+    # 智能查找时间列和血糖列 (默认：第1列=时间，最后1列=血糖)
+    time_col, glucose_col = find_cgm_columns(df.columns)
     
-    # 智能查找时间列和血糖列
-    time_col = None
-    glucose_col = None
-    
-    for col in cols:
-        c = str(col).lower()
-        if not time_col and any(k in c for k in ['time', 'date', 'timestamp', 'datetime']):
-            time_col = col
-        if not glucose_col and any(k in c for k in ['glucose', 'value', 'sg', '血糖']):
-            glucose_col = col
+    # 解析
+    return finalize_cgm(parse_timestamps(df[time_col], errors='coerce'),
+                        pd.to_numeric(df[glucose_col], errors='coerce'))
+
+
+# 机器导出的干净两列 CSV 表头
+_CLEAN_CSV_HEADERS = frozenset({'timestamp,glucose', 'time,glucose', 'time,sg'})
+
+
+def _parse_clean_csv(text: str) -> Optional[pd.DataFrame]:
+    """表头为已知两列且没有注释行的 CSV 直接整段读取，不是这种格式时返回 None
     
-    # 默认：第1列=时间，最后1列=血糖
-    if not time_col:
-        time_col = cols[0]
-    if not glucose_col:
-        glucose_col = cols[-1]
+    跳过 WXQI 尝试、逐行清理和分隔符检测；结果与 parse_standard_format 相同。
+    逗号后的空格要靠 skipinitialspace 去掉，pyarrow/polars 读取器都不支持该参数，
+    所以这条路径只用 pandas 的 C 引擎，不经 read_cgm_csv
+    """
+    head = text[:256].lstrip().split('\n', 1)[0].strip().lower()
+    if head not in _CLEAN_CSV_HEADERS or '#' in text:
+        return None
+    df = pd.read_csv(io.StringIO(text), skipinitialspace=True)
+    return finalize_cgm(parse_timestamps(df.iloc[:, 0], errors='coerce'),
+                        pd.to_numeric(df.iloc[:, 1], errors='coerce'))
+
+
+def parse_cgm_buffer(data: bytes) -> pd.DataFrame:
+    """
+    解析前端 Worker 预解析的二进制 CGM 数据
     
-    # 解析
-    df['timestamp'] = pd.to_datetime(df[time_col], errors='coerce')
-    df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
+    格式: 小端 float64 数组，前一半为时间 (本地时间按 UTC 计的秒数)，后一半为血糖原始值
+    """
+    arr = np.frombuffer(data, dtype='<f8')
+    if arr.size == 0 or arr.size % 2:
+        raise ValueError("Invalid buffer")
     
-    # mmol/L 转 mg/dL (值 < 30 说明是 mmol/L)
-    if df['glucose'].max() < 30:
-        df['glucose'] = df['glucose'] * 18
+    times, values = arr.reshape(2, -1)
+    return finalize_cgm(pd.to_datetime(times.astype('int64'), unit='s'), values)
+
+
+def parse_cgm_text(text: str) -> pd.DataFrame:
+    """
+    解析网页粘贴的 CGM 文本 (逗号/制表符/分号/空白分隔)
+    跳过列数不符的行；时间列须能完整解析
+    """
+    # 先做廉价的注释判断，每行只 strip 一次
+    lines = [s for l in text.split('\n') if not l.startswith('#') and (s := l.strip())]
+    cleaned = '\n'.join(lines)
+    sep = sniff_delimiter(cleaned)
+    if sep == r'\s+':
+        df = read_cgm_csv(cleaned, sep=sep, on_bad_lines='skip', header=None)
+    else:
+        df = read_cgm_csv(cleaned, sep=sep, on_bad_lines='skip')
     
-    df = df.dropna(subset=['glucose', 'timestamp'])
-    return df.sort_values('timestamp')
+    time_col, glucose_col = find_cgm_columns(df.columns)
+    # glucose 保持 float64：numpy.float64 是 float 子类，分析结果可直接 JSON 序列化；
+    # 换成 float32 后 round() 得到的 np.float32 会让 jsonable_encoder 报错，且 109.8 会变成 109.80000305
+    return finalize_cgm(parse_timestamps(df[time_col]), pd.to_numeric(df[glucose_col], errors='coerce'))
 
 
 def parse_cgm_data(text: str) -> pd.DataFrame:
@@ -114,6 +257,11 @@ def parse_cgm_data(text: str) -> pd.DataFrame:
     自动检测并解析 CGM 数据
     尝试多种格式
     """
+    # 最常见的干净 CSV 走快速路径
+    df = _parse_clean_csv(text)
+    if df is not None:
+        return df
+    
     # 尝试 WXQI 格式 (中国常见)
     try:
         return parse_wxqi_format(text)
@@ -16,14 +16,15 @@ class GlucoseChart:
         self.cgm_data = cgm_data.sort_values('timestamp')
     
     def get_time_series_data(self) -> Dict:
-        """获取时序数据 (用于折线图)"""
-        data = []
-        for _, row in self.cgm_data.iterrows():
-            data.append({
-                'x': row['timestamp'].isoformat(),
-                'y': round(row['glucose'], 1)
-            })
-        return {'time_series': data}
+        """获取时序数据 (用于折线图)
+        
+        平行数组 {'t': 毫秒时间戳, 'g': 血糖}，与 /api/cgm/analyze 的 cgm_data 格式相同；
+        不逐点生成 {x, y} 字典，响应中也不重复键名
+        """
+        return {'time_series': {
+            't': self.cgm_data['timestamp'].to_numpy().astype('datetime64[ms]').astype('int64'),
+            'g': self.cgm_data['glucose'].to_numpy(dtype=np.float64).round(1)
+        }}
     
     def get_tir_pie_data(self, low: float = 70, high: float = 180) -> Dict:
         """获取 TIR 饼图数据"""
@@ -119,8 +120,8 @@ class ReportGenerator:
         ]
         
         # 添加原始数据
-        for _, row in self.cgm_data.sort_values('timestamp').iterrows():
-            csv_lines.append(f"{row['timestamp'].isoformat()},{row['glucose']:.1f}")
+        data = self.cgm_data.sort_values('timestamp')
+        csv_lines.extend(f"{t.isoformat()},{g:.1f}" for t, g in zip(data['timestamp'], data['glucose']))
         
         return '\n'.join(csv_lines)
     
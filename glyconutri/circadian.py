@@ -236,13 +236,9 @@ class BiomarkerAnalysis:
         # MAGE 计算
         mean_g = features['mean']
         std_g = features['std']
-        excursions = []
-        prev = sorted_data['glucose'].iloc[0]
-        for g in sorted_data['glucose'].iloc[1:]:
-            if abs(g - prev) >= std_g:
-                excursions.append(abs(g - prev))
-            prev = g
-        features['mage'] = round(np.mean(excursions), 1) if excursions else 0
+        amplitudes = np.abs(np.diff(sorted_data['glucose'].to_numpy(dtype=np.float64)))
+        excursions = amplitudes[amplitudes >= std_g]
+        features['mage'] = round(excursions.mean(), 1) if excursions.size else 0
         
         return {'biomarkers': features}
     
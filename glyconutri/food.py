@@ -2,9 +2,12 @@
 食物 GI/GL 计算模块 - 扩展版
 """
 
+from functools import lru_cache
+
 from glyconutri.gi_database import GI_DATABASE, CARBS_DATABASE, get_carbs
 
 
+@lru_cache(maxsize=4096)
 def get_gi(food_name: str) -> float:
     """查询食物的 GI 值"""
     # 精确匹配
@@ -47,6 +50,13 @@ def get_gl_category(gl: float) -> str:
 
 def get_food_info(food_name: str, carbs: float = None) -> dict:
     """获取食物的完整营养信息"""
+    info = _food_info(food_name, carbs)
+    return dict(info) if info else None
+
+
+@lru_cache(maxsize=4096)
+def _food_info(food_name: str, carbs: float = None) -> dict:
+    """get_food_info 的缓存实现 (数据库只读)"""
     gi = get_gi(food_name)
     if gi is None:
         return None
@@ -71,10 +81,41 @@ def get_food_info(food_name: str, carbs: float = None) -> dict:
 
 def search_foods(keyword: str) -> list:
     """搜索食物"""
-    keyword = keyword.lower()
+    # 缓存里的 dict 在请求间共享，逐条复制后返回，调用方修改结果不会影响缓存
+    return [dict(r) for r in _search_foods(keyword.lower())]
+
+
+def _build_ngram_index(names: list) -> dict:
+    """构建 (已转小写的) 食物名的单字/双字倒排索引: n-gram -> 名称下标集合"""
+    index = {}
+    for i, name in enumerate(names):
+        for n in (1, 2):
+            for j in range(len(name) - n + 1):
+                index.setdefault(name[j:j + n], set()).add(i)
+    return index
+
+
+_FOOD_NAMES = list(GI_DATABASE)
+# 小写名称与 _FOOD_NAMES 按下标对应，只转换一次，搜索时不再逐个 lower()
+_FOOD_NAMES_LOWER = [name.lower() for name in _FOOD_NAMES]
+_NGRAM_INDEX = _build_ngram_index(_FOOD_NAMES_LOWER)
+
+
+@lru_cache(maxsize=4096)
+def _search_foods(keyword: str) -> tuple:
+    # 先用 n-gram 索引取候选，再做子串校验；按数据库原顺序返回
+    if keyword:
+        n = 1 if len(keyword) == 1 else 2
+        grams = {keyword[j:j + n] for j in range(len(keyword) - n + 1)}
+        candidates = sorted(set.intersection(*(_NGRAM_INDEX.get(g, set()) for g in grams)))
+    else:
+        candidates = range(len(_FOOD_NAMES))
+    
     results = []
-    for name, gi in GI_DATABASE.items():
-        if keyword in name.lower():
+    for i in candidates:
+        if keyword in _FOOD_NAMES_LOWER[i]:
+            name = _FOOD_NAMES[i]
+            gi = GI_DATABASE[name]
             carbs = get_carbs(name)
             results.append({
                 "name": name,
@@ -82,12 +123,16 @@ def search_foods(keyword: str) -> list:
                 "gi_category": get_gi_category(gi),
                 "carbs_per_100g": carbs
             })
-    return results
+    return tuple(results)
 
 
 def list_foods_by_gi_category(category: str) -> list:
     """按 GI 类别列出食物"""
-    category = category.lower()
+    return [dict(r) for r in _list_foods_by_gi_category(category.lower())]
+
+
+@lru_cache(maxsize=16)
+def _list_foods_by_gi_category(category: str) -> tuple:
     results = []
     for name, gi in GI_DATABASE.items():
         cat = get_gi_category(gi).lower()
@@ -98,4 +143,4 @@ def list_foods_by_gi_category(category: str) -> list:
                 "gi": gi,
                 "carbs_per_100g": carbs
             })
-    return sorted(results, key=lambda x: x['gi'])
+    return tuple(sorted(results, key=lambda x: x['gi']))
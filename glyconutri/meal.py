@@ -77,51 +77,73 @@ class Meal:
         self.timestamp = timestamp or datetime.now()
         self.name = name
         self.foods: List[FoodItem] = []
+        self._totals = None
         
     def add_food(self, name: str, weight: float):
         """添加食物"""
         food = FoodItem(name, weight)
         self.foods.append(food)
+        self._totals = None
         return food
     
     # ============ 营养汇总 ============
     
+    def _get_totals(self) -> dict:
+        """一次遍历汇总全部营养素
+        
+        分析报告会反复读取各项合计，结果缓存到下次 add_food
+        """
+        if self._totals is None:
+            totals = dict.fromkeys(['carbs', 'protein', 'fat', 'fiber', 'calories', 'gl', 'gi_carbs'], 0)
+            for f in self.foods:
+                carbs, protein, fat, gi = f.carbs, f.protein, f.fat, f.gi
+                totals['carbs'] += carbs
+                totals['protein'] += protein
+                totals['fat'] += fat
+                totals['fiber'] += f.fiber
+                totals['calories'] += carbs * 4 + protein * 4 + fat * 9
+                totals['gl'] += gi * carbs / 100
+                totals['gi_carbs'] += gi * carbs
+            self._totals = totals
+        return self._totals
+    
     @property
     def total_carbs(self) -> float:
         """总碳水 (g)"""
-        return sum(f.carbs for f in self.foods)
+        return self._get_totals()['carbs']
     
     @property
     def total_protein(self) -> float:
         """总蛋白质 (g)"""
-        return sum(f.protein for f in self.foods)
+        return self._get_totals()['protein']
     
     @property
     def total_fat(self) -> float:
         """总脂肪 (g)"""
-        return sum(f.fat for f in self.foods)
+        return self._get_totals()['fat']
     
     @property
     def total_fiber(self) -> float:
         """总纤维 (g)"""
-        return sum(f.fiber for f in self.foods)
+        return self._get_totals()['fiber']
     
     @property
     def total_calories(self) -> float:
         """总热量 (kcal)"""
-        return sum(f.calories for f in self.foods)
+        return self._get_totals()['calories']
     
     @property
     def weighted_gi(self) -> float:
         """加权 GI（按碳水权重）"""
-        if self.total_carbs == 0:
+        totals = self._get_totals()
+        if totals['carbs'] == 0:
             return 0
-        return sum(f.gi * f.carbs for f in self.foods) / self.total_carbs
+        return totals['gi_carbs'] / totals['carbs']
     
     @property
     def total_gl(self) -> float:
         """总 GL"""
-        return sum(f.gl for f in self.foods)
+        return self._get_totals()['gl']
     
     # ============ 膳食结构分析 ============
     
@@ -10,6 +10,20 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 
 
+def _trapezoid_auc(window: pd.DataFrame, baseline: float = None, unit_seconds: int = 3600) -> float:
+    """按时间排序后梯形积分血糖曲线，时间单位为 unit_seconds 秒
+    
+    给出 baseline 时只计高于基线的部分 (增量 AUC)。整段在 numpy 数组上计算，
+    最后按顺序累加各梯形，与逐行累加的结果逐位一致
+    """
+    window = window.sort_values('timestamp')
+    g = window['glucose'].to_numpy(dtype=np.float64)
+    if baseline is not None:
+        g = np.maximum(g - baseline, 0)
+    dt = np.diff(window['timestamp'].to_numpy()) / np.timedelta64(unit_seconds, 's')
+    return sum(((g[1:] + g[:-1]) * dt / 2).tolist())
+
+
 class MealRecord:
     """餐食记录"""
     def __init__(self, food_name: str, weight: float, carbs: float = None, 
@@ -113,14 +127,14 @@ class PostMealAnalysis:
         
         baseline = self.calculate_baseline()
         
-        # 找到从基线上升的第一个点
+        # 找到餐后第一个高于基线的点，计算上升速率
         window_sorted = window.sort_values('timestamp')
-        for i, row in window_sorted.iterrows():
-            if row['glucose'] > baseline:
-                # 计算上升速率
-                time_diff = (row['timestamp'] - self.meal.timestamp).total_seconds() / 60
-                if time_diff > 0:
-                    return (row['glucose'] - baseline) / time_diff
+        g = window_sorted['glucose'].to_numpy(dtype=np.float64)
+        minutes = (window_sorted['timestamp'] - self.meal.timestamp).dt.total_seconds().to_numpy() / 60
+        rising = np.flatnonzero((g > baseline) & (minutes > 0))
+        if rising.size:
+            i = rising[0]
+            return (g[i] - baseline) / minutes[i]
         return None
     
     def rate_of_decline(self) -> Optional[float]:
@@ -140,7 +154,7 @@ class PostMealAnalysis:
         
         # 使用线性回归计算下降速率
         from scipy import stats
-        times = [(row['timestamp'] - peak_time).total_seconds() / 60 for _, row in after_peak.iterrows()]
+        times = ((after_peak['timestamp'] - peak_time).dt.total_seconds() / 60).tolist()
         values = after_peak['glucose'].values
         
         if len(times) > 1 and times[-1] > 0:
@@ -174,17 +188,8 @@ class PostMealAnalysis:
         if window.empty or window.shape[0] < 2:
             return None
         
-        window = window.sort_values('timestamp')
-        window['time_diff'] = window['timestamp'].diff().dt.total_seconds() / 60  # 分钟
-        
         # 梯形积分 (mg/dL·min)
-        auc = 0
-        for i in range(1, len(window)):
-            h = window.iloc[i]['glucose'] + window.iloc[i-1]['glucose']
-            t = window.iloc[i]['time_diff']
-            auc += h * t / 2
-        
-        return auc
+        return _trapezoid_auc(window, unit_seconds=60)
     
     def calculate_incremental_auc(self, hours: int = 2) -> Optional[float]:
         """增量曲线下面积 (iAUC) - PD: 净效应"""
@@ -196,22 +201,8 @@ class PostMealAnalysis:
         if baseline is None:
             return None
         
-        # 只计算高于基线的部分
-        window = window.copy()
-        window['above_baseline'] = window['glucose'] - baseline
-        window.loc[window['above_baseline'] < 0, 'above_baseline'] = 0
-        
-        window = window.sort_values('timestamp')
-        window['time_diff'] = window['timestamp'].diff().dt.total_seconds() / 3600  # 小时
-        
-        # 梯形积分 (mg/dL·h)
-        iauc = 0
-        for i in range(1, len(window)):
-            h = window.iloc[i]['above_baseline'] + window.iloc[i-1]['above_baseline']
-            t = window.iloc[i]['time_diff']
-            iauc += h * t / 2
-        
-        return iauc
+        # 只计算高于基线的部分，梯形积分 (mg/dL·h)
+        return _trapezoid_auc(window, baseline)
     
     def calculate_mage(self, hours: int = 2, sd_threshold: float = 1.0) -> Optional[float]:
         """MAGE - Mean Amplitude of Glycemic Excursions
@@ -226,15 +217,10 @@ class PostMealAnalysis:
         mean_g = window['glucose'].mean()
         std_g = window['glucose'].std()
         
-        excursions = []
-        prev = window['glucose'].iloc[0]
-        for g in window['glucose'].iloc[1:]:
-            diff = g - prev
-            if abs(diff) >= std_g * sd_threshold:
-                excursions.append(abs(diff))
-            prev = g
+        diffs = np.abs(np.diff(window['glucose'].to_numpy(dtype=np.float64)))
+        excursions = diffs[diffs >= std_g * sd_threshold]
         
-        return np.mean(excursions) if excursions else None
+        return excursions.mean() if excursions.size else None
     
     def duration_above_target(self, target: float = 180, hours: int = 2) -> Optional[float]:
         """超标持续时间 (分钟) - PD: 高血糖暴露"""
@@ -255,21 +241,11 @@ class PostMealAnalysis:
         if window.empty:
             return None
         
-        # 统计方向变化次数
-        count = 0
-        prev = window['glucose'].iloc[0]
-        direction = 0  # 0: 初始, 1: 上升, -1: 下降
+        # 统计方向变化次数 (只看幅度达到阈值的变化)
+        diffs = np.diff(window['glucose'].to_numpy(dtype=np.float64))
+        directions = np.sign(diffs[np.abs(diffs) >= threshold])
         
-        for g in window['glucose'].iloc[1:]:
-            diff = g - prev
-            if abs(diff) >= threshold:
-                new_direction = 1 if diff > 0 else -1
-                if direction != 0 and new_direction != direction:
-                    count += 1
-                direction = new_direction
-            prev = g
-        
-        return count
+        return int(np.count_nonzero(directions[1:] != directions[:-1]))
     
     def half_life_estimate(self) -> Optional[float]:
         """血糖半衰期估计 (分钟) - PK: 消除半衰期
@@ -293,10 +269,10 @@ class PostMealAnalysis:
         after_peak = window[window['timestamp'] > peak_time].sort_values('timestamp')
         
         # 找到血糖降到一半的时间点
-        for _, row in after_peak.iterrows():
-            if row['glucose'] <= half_value:
-                half_time = (row['timestamp'] - peak_time).total_seconds() / 60
-                return half_time * 2  # 半衰期 = 降到一半的时间 * 2
+        below = np.flatnonzero(after_peak['glucose'].to_numpy(dtype=np.float64) <= half_value)
+        if below.size:
+            half_time = (after_peak['timestamp'].iloc[below[0]] - peak_time).total_seconds() / 60
+            return half_time * 2  # 半衰期 = 降到一半的时间 * 2
         
         return None
     
@@ -435,19 +411,7 @@ class PostMealAnalysis:
         if len(early) < 2:
             return None
         
-        early = early.copy()
-        early['above_baseline'] = early['glucose'] - baseline
-        early.loc[early['above_baseline'] < 0, 'above_baseline'] = 0
-        early = early.sort_values('timestamp')
-        early['time_diff'] = early['timestamp'].diff().dt.total_seconds() / 3600
-        
-        auc = 0
-        for i in range(1, len(early)):
-            h = early.iloc[i]['above_baseline'] + early.iloc[i-1]['above_baseline']
-            t = early.iloc[i]['time_diff']
-            auc += h * t / 2
-        
-        return auc
+        return _trapezoid_auc(early, baseline)
     
     def late_phase_auc(self, start_min: int = 60, end_hours: int = 2) -> Optional[float]:
         """晚期相 AUC (60-120min) - 胰岛素分泌晚期响应"""
@@ -467,19 +431,7 @@ class PostMealAnalysis:
         if len(late) < 2:
             return None
         
-        late = late.copy()
-        late['above_baseline'] = late['glucose'] - baseline
-        late.loc[late['above_baseline'] < 0, 'above_baseline'] = 0
-        late = late.sort_values('timestamp')
-        late['time_diff'] = late['timestamp'].diff().dt.total_seconds() / 3600
-        
-        auc = 0
-        for i in range(1, len(late)):
-            h = late.iloc[i]['above_baseline'] + late.iloc[i-1]['above_baseline']
-            t = late.iloc[i]['time_diff']
-            auc += h * t / 2
-        
-        return auc
+        return _trapezoid_auc(late, baseline)
     
     def peak_delay(self) -> Optional[float]:
         """达峰延迟 (分钟)
@@ -6,10 +6,15 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator, Tuple
 from collections import defaultdict
 
 
+def _gap_breaks(timestamps: pd.Series, seconds: float) -> np.ndarray:
+    """已排序时间序列中与前一读数间隔超过 seconds 秒的位置"""
+    return np.flatnonzero(timestamps.diff().dt.total_seconds().to_numpy() > seconds)
+
+
 class TrendAnalysis:
     """血糖趋势分析"""
     
@@ -38,7 +43,8 @@ class TrendAnalysis:
     
     def _calculate_tir(self, day_data: pd.DataFrame, low: float = 70, high: float = 180) -> float:
         """计算指定日期的 TIR"""
-        in_range = ((day_data['glucose'] >= low) & (day_data['glucose'] <= high)).sum()
+        g = day_data['glucose'].to_numpy(dtype=np.float64, na_value=np.nan)
+        in_range = np.count_nonzero((g >= low) & (g <= high))
         return in_range / len(day_data) * 100 if len(day_data) > 0 else 0
     
     def weekly_summary(self) -> Dict:
@@ -160,71 +166,66 @@ class TrendAnalysis:
     
     def _find_high_episodes(self) -> List[Dict]:
         """找到持续高血糖事件"""
-        high = self.cgm_data[self.cgm_data['glucose'] > 180].copy()
+        high = self.cgm_data[self.cgm_data['glucose'] > 180]
         if high.empty:
             return []
         
-        episodes = []
-        start = None
-        prev_time = None
-        
         high = high.sort_values('timestamp')
-        for _, row in high.iterrows():
-            if start is None:
-                start = row['timestamp']
-                prev_time = row['timestamp']
-            elif (row['timestamp'] - prev_time).total_seconds() > 3600:  # 超过1小时
-                # 保存上一个事件
-                end = prev_time
-                duration = (end - start).total_seconds() / 3600
-                if duration >= 2:  # 持续至少2小时
-                    episodes.append({
-                        'start': start.isoformat(),
-                        'end': end.isoformat(),
-                        'duration_hours': round(duration, 1),
-                        'max_glucose': high[(high['timestamp'] >= start) & (high['timestamp'] <= end)]['glucose'].max()
-                    })
-                start = row['timestamp']
-            prev_time = row['timestamp']
+        ts = high['timestamp']
+        g = high['glucose'].to_numpy()
+        
+        # 相邻读数间隔超过 1 小时处断开；最后一段之后没有断点，不计入
+        episodes = []
+        start_i = 0
+        for i in _gap_breaks(ts, 3600):
+            start, end = ts.iloc[start_i], ts.iloc[i - 1]
+            duration = (end - start).total_seconds() / 3600
+            if duration >= 2:  # 持续至少2小时
+                episodes.append({
+                    'start': start.isoformat(),
+                    'end': end.isoformat(),
+                    'duration_hours': round(duration, 1),
+                    'max_glucose': g[start_i:i].max()
+                })
+            start_i = i
         
         return episodes
     
     def _find_low_episodes(self) -> List[Dict]:
         """找到低血糖事件"""
-        low = self.cgm_data[self.cgm_data['glucose'] < 70].copy()
+        low = self.cgm_data[self.cgm_data['glucose'] < 70]
         if low.empty:
             return []
         
-        episodes = []
-        start = None
-        prev_time = None
-        
         low = low.sort_values('timestamp')
-        for _, row in low.iterrows():
-            if start is None:
-                start = row['timestamp']
-                prev_time = row['timestamp']
-            elif (row['timestamp'] - prev_time).total_seconds() > 1800:  # 超过30分钟
-                if start != prev_time:
-                    episodes.append({
-                        'time': start.isoformat(),
-                        'min_glucose': low[(low['timestamp'] >= start) & (low['timestamp'] <= prev_time)]['glucose'].min()
-                    })
-                start = row['timestamp']
-            prev_time = row['timestamp']
+        ts = low['timestamp']
+        g = low['glucose'].to_numpy()
+        
+        # 相邻读数间隔超过 30 分钟处断开；只有单个读数的段与最后一段不计入
+        episodes = []
+        start_i = 0
+        for i in _gap_breaks(ts, 1800):
+            if ts.iloc[start_i] != ts.iloc[i - 1]:
+                episodes.append({
+                    'time': ts.iloc[start_i].isoformat(),
+                    'min_glucose': g[start_i:i].min()
+                })
+            start_i = i
         
         return episodes
     
+    def iter_trend(self) -> Iterator[Tuple[str, object]]:
+        """逐段生成完整趋势分析的 (键, 结果)，每段算完即可发送，不必等全部完成"""
+        yield 'daily', self.daily_summary()
+        yield from self.weekly_summary().items()
+        yield from self.monthly_summary().items()
+        yield from self.time_of_day_analysis().items()
+        yield from self.weekday_analysis().items()
+        yield from self.pattern_detection().items()
+    
     def get_full_trend(self) -> Dict:
         """完整趋势分析"""
-        return {
-            'daily': self.daily_summary(),
-            **self.weekly_summary(),
-            **self.monthly_summary(),
-            **self.time_of_day_analysis(),
-            **self.weekday_analysis(),
-            **self.pattern_detection()
-        }
+        return dict(self.iter_trend())
 
 
 # ============ 便捷函数 ============
@@ -1,12 +1,80 @@
 """
 语音输入模块
 使用 Faster Whisper 进行本地语音识别
+可选 whisper.cpp 后端 (GLYCONUTRI_VOICE_BACKEND=whisper_cpp)
 """
 
+import io
 import os
+import re
 import tempfile
-from typing import Dict, Optional
-from faster_whisper import WhisperModel
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+try:
+    import librosa
+except ImportError:
+    librosa = None
+
+# Whisper 模型输入采样率
+SAMPLE_RATE = 16000
+
+
+@lru_cache(maxsize=None)
+def _temp_dir() -> Optional[str]:
+    """临时音频目录：优先内存盘 /dev/shm (macOS 等无此目录时用系统默认)
+    
+    首次写入临时文件时才检查并缓存，导入模块时不做文件系统调用
+    """
+    if "GLYCONUTRI_TMPDIR" in os.environ:
+        return os.environ["GLYCONUTRI_TMPDIR"]
+    return "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def _write_temp_audio(audio_bytes: bytes) -> str:
+    """写入临时音频文件，返回路径 (调用方负责删除)"""
+    fd, temp_path = tempfile.mkstemp(suffix='.webm', dir=_temp_dir())
+    try:
+        view = memoryview(audio_bytes)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    return temp_path
+
+
+def decode_audio(audio_bytes: bytes) -> Optional[np.ndarray]:
+    """
+    解码音频为 16kHz 单声道 float32 数组
+    
+    需要 soundfile (重采样还需 librosa)；格式不支持时返回 None，
+    由调用方回退到临时文件 + ffmpeg 解码
+    """
+    if sf is None:
+        return None
+    
+    try:
+        wav, sr = sf.read(io.BytesIO(audio_bytes), dtype='float32')
+    except Exception:
+        return None
+    
+    if wav.ndim > 1:
+        wav = wav.mean(axis=1)
+    
+    if sr != SAMPLE_RATE:
+        if librosa is None:
+            return None
+        wav = librosa.resample(wav, orig_sr=sr, target_sr=SAMPLE_RATE)
+    
+    return wav.astype(np.float32, copy=False)
 
 
 class VoiceInput:
@@ -21,11 +89,14 @@ class VoiceInput:
         """
         self.model_size = model_size
         self.model = None
+        self._info_complete = False
         self._load_model()
     
     def _load_model(self):
         """加载模型"""
         try:
+            from faster_whisper import WhisperModel
+            
             # 使用 CPU
             self.model = WhisperModel(
                 self.model_size,
@@ -33,16 +104,21 @@ class VoiceInput:
                 compute_type="int8"
             )
             print(f"✓ Whisper model '{self.model_size}' loaded")
+            
+            # 一次性检查 TranscriptionInfo 字段，避免每次转录都 hasattr
+            from faster_whisper.transcribe import TranscriptionInfo
+            fields = getattr(TranscriptionInfo, '_fields', None) or getattr(TranscriptionInfo, '__dataclass_fields__', {})
+            self._info_complete = all(f in fields for f in ('language', 'language_probability', 'duration'))
         except Exception as e:
             print(f"✗ Failed to load model: {e}")
             self.model = None
     
-    def transcribe_audio(self, audio_path: str, language: str = "zh") -> Dict:
+    def transcribe_audio(self, audio_path, language: str = "zh") -> Dict:
         """
         转录音频文件
         
         Args:
-            audio_path: 音频文件路径
+            audio_path: 音频文件路径或 16kHz float32 数组
             language: 语言代码 (zh, en, auto)
         
         Returns:
@@ -53,30 +129,69 @@ class VoiceInput:
         
         try:
             # 转录
-            segments, info = self.model.transcribe(
-                audio_path,
-                language=language if language != "auto" else None,
-                beam_size=5,
-                vad_filter=True
-            )
+            segments, info = self._run_model(audio_path, language)
             
-            # 收集所有片段
-            text_parts = []
+            # 逐段写入缓冲区
+            buf = io.StringIO()
             for segment in segments:
-                text_parts.append(segment.text)
+                buf.write(segment.text)
             
-            full_text = "".join(text_parts).strip()
+            full_text = buf.getvalue().strip()
             
-            return {
-                "text": full_text,
-                "language": info.language if hasattr(info, 'language') else language,
-                "language_probability": info.language_probability if hasattr(info, 'language_probability') else 0,
-                "duration": info.duration if hasattr(info, 'duration') else 0
-            }
+            return self._build_result(full_text, info, language)
             
         except Exception as e:
             return {"error": str(e), "text": ""}
     
+    def transcribe_stream(self, audio_path, language: str = "zh") -> Iterator[Dict]:
+        """
+        流式转录音频文件，每解码完一个片段即产出
+        
+        Args:
+            audio_path: 音频文件路径或 16kHz float32 数组
+            language: 语言代码 (zh, en, auto)
+        
+        Yields:
+            片段字典 {partial, start, end}
+        """
+        if not self.model:
+            yield {"error": "模型未加载", "partial": ""}
+            return
+        
+        try:
+            segments, _ = self._run_model(audio_path, language)
+            for segment in segments:
+                yield {"partial": segment.text, "start": segment.start, "end": segment.end}
+        except Exception as e:
+            yield {"error": str(e), "partial": ""}
+    
+    def _run_model(self, audio, language: str):
+        """调用模型，返回 (segments, info)；segments 为惰性生成器"""
+        return self.model.transcribe(
+            audio,
+            language=language if language != "auto" else None,
+            beam_size=5,
+            vad_filter=True
+        )
+    
+    def _build_result(self, full_text: str, info, language: str) -> Dict:
+        """组装转录结果"""
+        if self._info_complete:
+            return {
+                "text": full_text,
+                "language": info.language,
+                "language_probability": info.language_probability,
+                "duration": info.duration
+            }
+        
+        # 旧版 faster-whisper 兼容
+        return {
+            "text": full_text,
+            "language": getattr(info, 'language', language),
+            "language_probability": getattr(info, 'language_probability', 0),
+            "duration": getattr(info, 'duration', 0)
+        }
+    
     def transcribe_bytes(self, audio_bytes: bytes, language: str = "zh") -> Dict:
         """
         转录字节数据
@@ -85,10 +200,13 @@ class VoiceInput:
             audio_bytes: 音频字节数据
             language: 语言代码
         """
+        # 能直接解码则跳过临时文件和 ffmpeg
+        wav = decode_audio(audio_bytes)
+        if wav is not None:
+            return self.transcribe_audio(wav, language)
+        
         # 保存到临时文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as f:
-            f.write(audio_bytes)
-            temp_path = f.name
+        temp_path = _write_temp_audio(audio_bytes)
         
         try:
             result = self.transcribe_audio(temp_path, language)
@@ -99,6 +217,95 @@ class VoiceInput:
                 os.unlink(temp_path)
             except:
                 pass
+    
+    def transcribe_bytes_stream(self, audio_bytes: bytes, language: str = "zh") -> Iterator[Dict]:
+        """
+        流式转录字节数据
+        
+        Args:
+            audio_bytes: 音频字节数据
+            language: 语言代码
+        """
+        wav = decode_audio(audio_bytes)
+        if wav is not None:
+            yield from self.transcribe_stream(wav, language)
+            return
+        
+        temp_path = _write_temp_audio(audio_bytes)
+        
+        try:
+            yield from self.transcribe_stream(temp_path, language)
+        finally:
+            try:
+                os.unlink(temp_path)
+            except:
+                pass
+
+
+class WhisperCppVoiceInput(VoiceInput):
+    """whisper.cpp 语音输入 (pywhispercpp)，支持 Q4_0/Q5_0 量化权重"""
+    
+    def _load_model(self):
+        """
+        加载模型
+        
+        model_size 可为模型名 (如 base-q5_1, large-v3-q5_0) 或 ggml 权重文件路径
+        """
+        try:
+            from pywhispercpp.model import Model
+            
+            self.model = Model(self.model_size, n_threads=os.cpu_count() or 4)
+            self._info_complete = True
+            print(f"✓ whisper.cpp model '{self.model_size}' loaded")
+        except Exception as e:
+            print(f"✗ Failed to load model: {e}")
+            self.model = None
+    
+    def _run_model(self, audio, language: str):
+        """调用 whisper.cpp，并映射为与 faster-whisper 相同的 (segments, info)"""
+        raw = self.model.transcribe(audio, language=language if language != "auto" else "auto")
+        
+        # whisper.cpp 时间戳单位为 10ms
+        segments = [SimpleNamespace(text=s.text, start=s.t0 / 100, end=s.t1 / 100) for s in raw]
+        info = SimpleNamespace(
+            language=language,
+            language_probability=0,
+            duration=segments[-1].end if segments else 0
+        )
+        return segments, info
+
+
+# 常见食物关键词 -> 营养库食物名
+MEAL_KEYWORDS = {
+    "米饭": "米饭",
+    "粥": "白粥",
+    "面条": "面条",
+    "馒头": "馒头",
+    "面包": "面包",
+    "牛奶": "牛奶",
+    "豆浆": "豆浆",
+    "鸡蛋": "鸡蛋",
+    "肉": "猪肉",
+    "鱼": "鱼肉",
+    "虾": "虾",
+    "蔬菜": "青菜",
+    "苹果": "苹果",
+    "香蕉": "香蕉",
+    "橙子": "橙子",
+    "奶茶": "奶茶",
+    "咖啡": "咖啡",
+    "可乐": "可乐",
+    "啤酒": "啤酒",
+    "白酒": "白酒",
+}
+
+_KEYWORD_PATTERN = '|'.join(re.escape(k) for k in sorted(MEAL_KEYWORDS, key=len, reverse=True))
+
+# 匹配 "X碗米饭" 或 "米饭X碗"，整句只扫描一次
+_QUANTITY_RE = re.compile(
+    rf'(?P<q>\d+(?:\.\d+)?)\s*[碗个杯盘份]?(?P<kw>{_KEYWORD_PATTERN})'
+    rf'|(?P<kw2>{_KEYWORD_PATTERN})(?:(?=\s*(?P<q2>\d+(?:\.\d+)?)))?'
+)
 
 
 class VoiceMealParser:
@@ -121,34 +328,11 @@ class VoiceMealParser:
         text = text.lower()
         found_foods = []
         
-        # 常见食物关键词
-        keywords = {
-            "米饭": "米饭",
-            "粥": "白粥",
-            "面条": "面条",
-            "馒头": "馒头",
-            "面包": "面包",
-            "牛奶": "牛奶",
-            "豆浆": "豆浆",
-            "鸡蛋": "鸡蛋",
-            "肉": "猪肉",
-            "鱼": "鱼肉",
-            "虾": "虾",
-            "蔬菜": "青菜",
-            "苹果": "苹果",
-            "香蕉": "香蕉",
-            "橙子": "橙子",
-            "奶茶": "奶茶",
-            "咖啡": "咖啡",
-            "可乐": "可乐",
-            "啤酒": "啤酒",
-            "白酒": "白酒",
-        }
+        quantities = self._extract_quantities(text)
         
-        for keyword, food_name in keywords.items():
-            if keyword in text:
-                # 尝试提取数量
-                quantity = self._extract_quantity(text, keyword)
+        for keyword, food_name in MEAL_KEYWORDS.items():
+            if keyword in quantities:
+                quantity = quantities[keyword]
                 
                 food_data = self.food_db.get(food_name, {})
                 
@@ -178,22 +362,25 @@ class VoiceMealParser:
             "meal_type": self._detect_meal_type(text)
         }
     
-    def _extract_quantity(self, text: str, keyword: str) -> float:
-        """提取数量"""
-        import re
-        
-        # 尝试匹配 "X碗", "X个", "X杯" 等
-        patterns = [
-            rf'(\d+(?:\.\d+)?)\s*[碗个杯盘份]?{keyword}',
-            rf'{keyword}\s*(\d+(?:\.\d+)?)\s*[碗个杯盘份]?',
-        ]
+    def _extract_quantities(self, text: str) -> Dict[str, float]:
+        """一次扫描提取所有关键词及数量 (默认1份)"""
+        prefix = {}
+        suffix = {}
+        seen = []
         
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                return float(match.group(1))
+        for match in _QUANTITY_RE.finditer(text):
+            if match.group('kw'):
+                keyword = match.group('kw')
+                prefix.setdefault(keyword, float(match.group('q')))
+            else:
+                keyword = match.group('kw2')
+                if match.group('q2'):
+                    suffix.setdefault(keyword, float(match.group('q2')))
+            if keyword not in seen:
+                seen.append(keyword)
         
-        return 1.0  # 默认1份
+        # "X碗米饭" 优先于 "米饭X碗"
+        return {k: prefix.get(k, suffix.get(k, 1.0)) for k in seen}
     
     def _detect_meal_type(self, text: str) -> str:
         """检测餐型"""
@@ -213,10 +400,14 @@ _voice_input: Optional[VoiceInput] = None
 
 
 def get_voice_input(model_size: str = "base") -> VoiceInput:
-    """获取语音输入实例"""
+    """获取语音输入实例 (后端由 GLYCONUTRI_VOICE_BACKEND 选择)"""
     global _voice_input
     if _voice_input is None:
-        _voice_input = VoiceInput(model_size)
+        backend = os.environ.get("GLYCONUTRI_VOICE_BACKEND", "faster_whisper")
+        if backend == "whisper_cpp":
+            _voice_input = WhisperCppVoiceInput(model_size)
+        else:
+            _voice_input = VoiceInput(model_size)
     return _voice_input
 
 
@@ -2,2631 +2,397 @@
 GlycoNutri Web - 完整版
 """
 
-from fastapi import FastAPI, UploadFile, File, Form, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, UploadFile, File, Request, Depends, HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse, FileResponse
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse
+from starlette.formparsers import MultiPartParser
+from fastapi.routing import APIRoute
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from typing import List, Optional
-import pandas as pd
-import json
-import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+from collections import OrderedDict
+import asyncio
 from datetime import datetime, timedelta
-import base64
 import io
+import os
+import mimetypes
+import gzip
+import hashlib
+import threading
+import functools
+import inspect
+import re
+import orjson
+
+try:
+    import ciso8601  # 可选：C 实现的 ISO 8601 解析
+except ImportError:
+    ciso8601 = None
+
+try:
+    from brotli_asgi import BrotliMiddleware  # 可选：浏览器支持时用 br 压缩，否则退回 gzip
+except ImportError:
+    BrotliMiddleware = None
 
-from glyconutri.cgm_adapters import parse_cgm_data
-from glyconutri.cgm import calculate_tir, calculate_gv
 from glyconutri.food import get_food_info, search_foods, list_foods_by_gi_category
-from glyconutri.analysis import analyze_glucose
-from glyconutri.postmeal import PostMealAnalysis, create_meal_session, RepeatedMealAnalyzer
-
-app = FastAPI(title="GlycoNutri", version="0.4")
-
-# 确保上传目录存在
-UPLOAD_DIR = "/tmp/glyconutri_uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-# ============ 首页 ============
-
-HTML_HOME = """
-<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>GlycoNutri - 临床研究工具</title>
-    <style>
-        * { box-sizing: border-box; margin: 0; padding: 0; }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #1a1a2e 0%, #16213e 50%, #0f3460 100%);
-            min-height: 100vh;
-            padding: 20px;
-            color: #333;
-        }
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-        }
-        
-        /* 头部 */
-        .header {
-            text-align: center;
-            color: white;
-            padding: 40px 0;
-        }
-        .header h1 {
-            font-size: 48px;
-            background: linear-gradient(135deg, #00d9ff, #a855f7);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            margin-bottom: 10px;
-        }
-        .header p { font-size: 18px; opacity: 0.8; }
-        
-        /* 主卡片 */
-        .main-card {
-            background: white;
-            border-radius: 24px;
-            box-shadow: 0 25px 50px rgba(0,0,0,0.3);
-            overflow: hidden;
-        }
-        
-        /* 标签页 */
-        .tabs {
-            display: flex;
-            background: #f8f9fc;
-            border-bottom: 1px solid #e5e7eb;
-        }
-        .tab {
-            flex: 1;
-            padding: 20px;
-            text-align: center;
-            cursor: pointer;
-            font-weight: 600;
-            color: #6b7280;
-            transition: all 0.3s;
-            border-bottom: 3px solid transparent;
-        }
-        .tab:hover { background: #f3f4f6; }
-        .tab.active {
-            color: #a855f7;
-            border-bottom-color: #a855f7;
-            background: white;
-        }
-        
-        /* 内容区 */
-        .content { padding: 30px; }
-        .tab-content { display: none; }
-        .tab-content.active { display: block; }
-        
-        /* 表单元素 */
-        .form-group { margin-bottom: 24px; }
-        label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: 600;
-            color: #1f2937;
-        }
-        .help-text {
-            font-size: 12px;
-            color: #6b7280;
-            margin-top: 4px;
-        }
-        input[type="text"], input[type="number"], input[type="datetime-local"], 
-        input[type="date"], select, textarea {
-            width: 100%;
-            padding: 14px;
-            border: 2px solid #e5e7eb;
-            border-radius: 12px;
-            font-size: 16px;
-            transition: all 0.3s;
-            background: #f9fafb;
-        }
-        input:focus, select:focus, textarea:focus {
-            border-color: #a855f7;
-            outline: none;
-            background: white;
-            box-shadow: 0 0 0 4px rgba(168,85,247,0.1);
-        }
-        
-        /* 按钮 */
-        .btn {
-            background: linear-gradient(135deg, #a855f7, #6366f1);
-            color: white;
-            border: none;
-            padding: 16px 32px;
-            border-radius: 12px;
-            font-size: 16px;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.3s;
-            display: inline-flex;
-            align-items: center;
-            justify-content: center;
-            gap: 8px;
-        }
-        .btn:hover { transform: translateY(-2px); box-shadow: 0 10px 30px rgba(168,85,247,0.3); }
-        .btn:disabled { opacity: 0.6; cursor: not-allowed; }
-        
-        .btn-secondary {
-            background: #f3f4f6;
-            color: #374151;
-        }
-        .btn-secondary:hover { background: #e5e7eb; }
-        
-        .btn-danger {
-            background: #fee2e2;
-            color: #dc2626;
-        }
-        
-        /* 文件上传 */
-        .file-upload {
-            border: 3px dashed #e5e7eb;
-            border-radius: 16px;
-            padding: 40px;
-            text-align: center;
-            cursor: pointer;
-            transition: all 0.3s;
-        }
-        .file-upload:hover { border-color: #a855f7; background: #faf5ff; }
-        .file-upload.dragover { border-color: #a855f7; background: #f3e8ff; }
-        
-        /* 食物列表 */
-        .food-list { margin-bottom: 20px; }
-        .food-item {
-            display: flex;
-            gap: 12px;
-            margin-bottom: 12px;
-            align-items: center;
-            padding: 16px;
-            background: #f9fafb;
-            border-radius: 12px;
-        }
-        .food-item input { flex: 1; }
-        .food-item .food-info {
-            flex: 2;
-            font-size: 14px;
-            color: #6b7280;
-        }
-        .btn-remove {
-            width: 40px;
-            height: 40px;
-            border-radius: 10px;
-            border: none;
-            background: #fee2e2;
-            color: #dc2626;
-            cursor: pointer;
-            font-size: 20px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-        
-        /* 结果展示 */
-        .result-card {
-            background: linear-gradient(135deg, #f0f9ff, #e0f2fe);
-            border-radius: 16px;
-            padding: 24px;
-            margin-top: 24px;
-        }
-        .result-card h3 {
-            color: #0369a1;
-            margin-bottom: 20px;
-            font-size: 20px;
-        }
-        
-        .result-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
-            gap: 16px;
-        }
-        .result-item {
-            background: white;
-            padding: 20px;
-            border-radius: 12px;
-            text-align: center;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.05);
-        }
-        .result-item.highlight {
-            background: linear-gradient(135deg, #a855f7, #6366f1);
-            color: white;
-        }
-        .result-item .value {
-            font-size: 32px;
-            font-weight: bold;
-        }
-        .result-item .label {
-            font-size: 13px;
-            margin-top: 4px;
-            opacity: 0.8;
-        }
-        
-        /* 食物结果 */
-        .food-result-item {
-            background: white;
-            padding: 16px;
-            border-radius: 12px;
-            margin-bottom: 12px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }
-        .food-result-item .name { font-weight: 600; }
-        .food-result-item .details { font-size: 14px; color: #6b7280; }
-        
-        /* 标签 */
-        .tag {
-            display: inline-block;
-            padding: 4px 12px;
-            border-radius: 20px;
-            font-size: 12px;
-            font-weight: 600;
-        }
-        .tag-low { background: #dcfce7; color: #166534; }
-        .tag-medium { background: #fef3c7; color: #92400e; }
-        .tag-high { background: #fee2e2; color: #dc2626; }
-        
-        /* 加载动画 */
-        .loading {
-            text-align: center;
-            padding: 40px;
-            color: #6b7280;
-        }
-        .spinner {
-            width: 40px;
-            height: 40px;
-            border: 4px solid #e5e7eb;
-            border-top-color: #a855f7;
-            border-radius: 50%;
-            animation: spin 1s linear infinite;
-            margin: 0 auto 16px;
-        }
-        @keyframes spin { to { transform: rotate(360deg); } }
-        
-        /* 历史记录 */
-        .history-item {
-            padding: 16px;
-            border-bottom: 1px solid #e5e7eb;
-        }
-        .history-item:last-child { border-bottom: none; }
-        .history-time { font-size: 14px; color: #6b7280; }
-        .history-foods { margin-top: 8px; }
-        
-        /* 页脚 */
-        .footer {
-            text-align: center;
-            padding: 30px;
-            color: rgba(255,255,255,0.6);
-            font-size: 14px;
-        }
-        
-        @media (max-width: 768px) {
-            .header h1 { font-size: 32px; }
-            .tabs { flex-wrap: wrap; }
-            .tab { flex: none; width: 33.33%; }
-            .food-item { flex-direction: column; align-items: stretch; }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🩸 GlycoNutri</h1>
-            <p>血糖营养计算工具 for 医生 & 护士</p>
-        </div>
-        
-        <div class="main-card">
-            <div class="tabs">
-                <div class="tab active" data-tab="cgm">📊 CGM 分析</div>
-                <div class="tab" data-tab="trend">📈 趋势分析</div>
-                <div class="tab" data-tab="circadian">🌙 昼夜节律</div>
-                <div class="tab" data-tab="biomarker">🧬 生物标志物</div>
-                <div class="tab" data-tab="meal">🍽️ 餐后分析</div>
-                <div class="tab" data-tab="meal-nutrition">🥗 餐食分析</div>
-                <div class="tab" data-tab="exercise">🏃 运动分析</div>
-                <div class="tab" data-tab="sleep">😴 睡眠分析</div>
-                <div class="tab" data-tab="medication">💊 药物分析</div>
-                <div class="tab" data-tab="report">📋 报告</div>
-                <div class="tab" data-tab="alcohol">🍺 饮酒分析</div>
-                <div class="tab" data-tab="stress">😰 压力分析</div>
-                <div class="tab" data-tab="illness">🤒 疾病分析</div>
-                <div class="tab" data-tab="patients">👥 患者管理</div>
-                <div class="tab" data-tab="comparison">📊 患者对比</div>
-                <div class="tab" data-tab="research">🔬 研究工具</div>
-                <div class="tab" data-tab="lab">🧪 实验室数据</div>
-                <div class="tab" data-tab="settings">⚙️ 设置</div>
-                <div class="tab" data-tab="food">🔍 食物查询</div>
-                <div class="tab" data-tab="history">📋 历史记录</div>
-                <div class="tab" data-tab="voice">🎤 语音输入</div>
-                <div class="tab" data-tab="image">📷 食物识别</div>
-            </div>
-            
-            <div class="content">
-                <!-- CGM 分析 -->
-                <div class="tab-content active" id="cgm">
-                    <div class="file-upload" id="dropZone">
-                        <input type="file" id="cgmFile" accept=".csv,.json,.txt" style="display:none">
-                        <div style="font-size: 48px; margin-bottom: 16px;">📁</div>
-                        <div style="font-size: 18px; font-weight: 600; margin-bottom: 8px;">
-                            点击或拖拽上传 CGM 数据
-                        </div>
-                        <div style="color: #6b7280;">
-                            支持 CSV、JSON、TXT 格式 (Dexcom, Libre, Medtronic)
-                        </div>
-                    </div>
-                    
-                    <div class="form-group" style="margin-top: 24px;">
-                        <label>或手动输入血糖数据</label>
-                        <textarea id="cgmText" rows="4" placeholder="格式: timestamp,glucose
-2026-02-15 08:00,95
-2026-02-15 08:15,98
-..."></textarea>
-                    </div>
-                    
-                    <button class="btn" onclick="analyzeCGM()" style="width: 100%;">
-                        分析血糖数据
-                    </button>
-                    
-                    <div id="cgmResult"></div>
-                </div>
-                
-                <!-- 趋势分析 -->
-                <div class="tab-content" id="trend">
-                    <div class="form-group">
-                        <label>📈 上传多日 CGM 数据</label>
-                        <div class="file-upload" id="trendDropZone">
-                            <input type="file" id="trendFile" accept=".csv,.json,.txt" style="display:none">
-                            <div style="font-size: 36px; margin-bottom: 12px;">📊</div>
-                            <div>点击或拖拽上传 CGM 数据</div>
-                        </div>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>或手动输入血糖数据</label>
-                        <textarea id="trendCgmText" rows="6" placeholder="支持多日数据
-格式: timestamp,glucose
-2026-02-15 08:00,95
-2026-02-15 08:15,98
-2026-02-15 08:30,102
-..."></textarea>
-                    </div>
-                    
-                    <button class="btn" onclick="analyzeTrend()" style="width: 100%;">
-                        分析血糖趋势
-                    </button>
-                    
-                    <div id="trendResult"></div>
-                    
-                    <div id="trendChart" style="margin-top:24px;display:none">
-                        <h4 style="margin-bottom:12px">📈 CGM 曲线</h4>
-                        <canvas id="cgmChart" style="width:100%;height:300px"></canvas>
-                        
-                        <h4 style="margin:24px 0 12px">🥧 TIR 分布</h4>
-                        <div style="display:flex;justify-content:center;gap:16px;margin-bottom:12px">
-                            <div id="tirBelow" style="text-align:center">
-                                <div style="width:60px;height:60px;background:#fee2e2;border-radius:50%;display:flex;align-items:center;justify-content:center;font-weight:bold;color:#dc2626">0%</div>
-                                <div style="margin-top:4px;font-size:12px">低</div>
-                            </div>
-                            <div id="tirInRange" style="text-align:center">
-                                <div style="width:60px;height:60px;background:#dcfce7;border-radius:50%;display:flex;align-items:center;justify-content:center;font-weight:bold;color:#16a34a">0%</div>
-                                <div style="margin-top:4px;font-size:12px">正常</div>
-                            </div>
-                            <div id="tirAbove" style="text-align:center">
-                                <div style="width:60px;height:60px;background:#fee2e2;border-radius:50%;display:flex;align-items:center;justify-content:center;font-weight:bold;color:#dc2626">0%</div>
-                                <div style="margin-top:4px;font-size:12px">高</div>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <button class="btn btn-secondary" id="exportCsvBtn" onclick="exportCSV()" style="width:100%;margin-top:16px;display:none">
-                        📥 导出 CSV 报告
-                    </button>
-                </div>
-                
-                <!-- 餐后分析 -->
-                <div class="tab-content" id="meal">
-                    <div class="form-group">
-                        <label>📅 餐食时间</label>
-                        <input type="datetime-local" id="mealTime">
-                    </div>
-                    
-                    <label>🍎 食物列表</label>
-                    <div class="food-list" id="foodList">
-                        <div class="food-item">
-                            <input type="text" placeholder="食物名称 (如: 米饭)" class="food-name">
-                            <input type="number" placeholder="重量(g)" class="food-weight" value="100">
-                            <div class="food-info" id="foodInfo0"></div>
-                            <button class="btn-remove" onclick="removeFood(this)">×</button>
-                        </div>
-                    </div>
-                    
-                    <button class="btn btn-secondary" onclick="addFood()" style="margin-bottom: 24px;">
-                        + 添加食物
-                    </button>
-                    
-                    <div class="form-group">
-                        <label>📊 CGM 数据 (餐后分析必需)</label>
-                        <div class="file-upload" id="cgmDropZone" style="padding: 20px;">
-                            <input type="file" id="mealCgmFile" accept=".csv,.json,.txt" style="display:none">
-                            <div>点击上传 CGM 数据文件</div>
-                        </div>
-                        <div class="help-text">或直接输入血糖数据</div>
-                        <textarea id="mealCgmText" rows="3" placeholder="timestamp,glucose 格式"></textarea>
-                    </div>
-                    
-                    <button class="btn" onclick="analyzeMeal()" style="width: 100%;">
-                        分析餐后血糖响应
-                    </button>
-                    
-                    <div id="mealResult"></div>
-                </div>
-                
-                <!-- 餐食营养分析 (新) -->
-                <div class="tab-content" id="meal-nutrition">
-                    <div class="form-group">
-                        <label>🍽️ 餐次</label>
-                        <select id="nutritionMealType">
-                            <option value="早餐">早餐</option>
-                            <option value="午餐">午餐</option>
-                            <option value="晚餐">晚餐</option>
-                            <option value="加餐">加餐</option>
-                        </select>
-                    </div>
-                    
-                    <label>🥗 食物列表</label>
-                    <div class="food-list" id="nutritionFoodList">
-                        <div class="food-item">
-                            <input type="text" placeholder="食物名称 (如: 米饭)" class="food-name-nutrition">
-                            <input type="number" placeholder="重量(g)" class="food-weight-nutrition" value="100">
-                            <button class="btn-remove" onclick="removeNutritionFood(this)">×</button>
-                        </div>
-                    </div>
-                    
-                    <button class="btn btn-secondary" onclick="addNutritionFood()" style="margin-bottom: 24px;">
-                        + 添加食物
-                    </button>
-                    
-                    <button class="btn" onclick="analyzeNutrition()" style="width: 100%;">
-                        分析餐食营养
-                    </button>
-                    
-                    <div id="nutritionResult"></div>
-                </div>
-                
-                <!-- 运动分析 -->
-                <div class="tab-content" id="exercise">
-                    <div class="form-group">
-                        <label>🏃 运动类型</label>
-                        <select id="exerciseType">
-                            <option value="走路">走路 - 轻度</option>
-                            <option value="慢跑">慢跑 - 中度</option>
-                            <option value="跑步">跑步 - 高强度</option>
-                            <option value="骑行">骑行 - 中度</option>
-                            <option value="游泳">游泳 - 中度</option>
-                            <option value="瑜伽">瑜伽 - 轻度</option>
-                            <option value="健身">健身 - 高强度</option>
-                            <option value="球类">球类 - 高强度</option>
-                        </select>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>⏱️ 时长 (分钟)</label>
-                        <input type="number" id="exerciseDuration" value="30" min="5" max="180">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>📅 运动开始时间</label>
-                        <input type="datetime-local" id="exerciseTime">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>📊 CGM 数据</label>
-                        <textarea id="exerciseCgmText" rows="3" placeholder="上传或输入血糖数据"></textarea>
-                    </div>
-                    
-                    <button class="btn" onclick="analyzeExercise()" style="width: 100%;">
-                        分析运动血糖影响
-                    </button>
-                    
-                    <div id="exerciseResult"></div>
-                </div>
-                
-                <!-- 睡眠分析 -->
-                <div class="tab-content" id="sleep">
-                    <div class="form-group">
-                        <label="😴 入睡时间</label>
-                        <input type="datetime-local" id="sleepTime">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label">☀️ 醒来时间</label>
-                        <input type="datetime-local" id="wakeTime">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>📊 CGM 数据</label>
-                        <textarea id="sleepCgmText" rows="3" placeholder="上传或输入血糖数据"></textarea>
-                    </div>
-                    
-                    <button class="btn" onclick="analyzeSleep()" style="width: 100%;">
-                        分析睡眠血糖
-                    </button>
-                    
-                    <div id="sleepResult"></div>
-                </div>
-                
-                <!-- 药物分析 -->
-                <div class="tab-content" id="medication">
-                    <div class="form-group">
-                        <label>💊 药物类型</label>
-                        <select id="medicationType" onchange="updateMedicationList()">
-                            <option value="口服">口服降糖药</option>
-                            <option value="胰岛素">胰岛素</option>
-                        </select>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>💉 药物名称</label>
-                        <select id="medicationName">
-                            <option value="二甲双胍">二甲双胍</option>
-                        </select>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>📝 剂量</label>
-                        <input type="number" id="medicationDosage" placeholder="剂量(mg)或单位(U)" step="0.5">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>📅 服药时间</label>
-                        <input type="datetime-local" id="medicationTime">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>📊 CGM 数据</label>
-                        <textarea id="medicationCgmText" rows="3" placeholder="上传或输入血糖数据"></textarea>
-                    </div>
-                    
-                    <button class="btn" onclick="analyzeMedication()" style="width: 100%;">
-                        分析药物血糖影响
-                    </button>
-                    
-                    <div id="medicationResult"></div>
-                </div>
-                
-                <!-- 食物查询 -->
-                <div class="tab-content" id="food">
-                    <div class="form-group">
-                        <label>🔍 搜索食物</label>
-                        <input type="text" id="foodSearch" placeholder="输入食物名称，如：米饭、苹果、香蕉">
-                    </div>
-                    
-                    <button class="btn" onclick="searchFood()" style="width: 100%; margin-bottom: 24px;">
-                        搜索
-                    </button>
-                    
-                    <div class="form-group">
-                        <label>或按 GI 类别浏览</label>
-                        <div style="display: flex; gap: 12px;">
-                            <button class="btn btn-secondary" onclick="browseGI('低')">低 GI</button>
-                            <button class="btn btn-secondary" onclick="browseGI('中')">中 GI</button>
-                            <button class="btn btn-secondary" onclick="browseGI('高')">高 GI</button>
-                        </div>
-                    </div>
-                    
-                    <div id="foodResult"></div>
-                </div>
-                
-                <!-- 昼夜节律分析 -->
-                <div class="tab-content" id="circadian">
-                    <div class="form-group">
-                        <label>🌙 上传 CGM 数据</label>
-                        <textarea id="circadianCgmText" rows="6" placeholder="上传多日 CGM 数据进行昼夜节律分析"></textarea>
-                    </div>
-                    
-                    <button class="btn" onclick="analyzeCircadian()" style="width: 100%;">
-                        分析昼夜节律
-                    </button>
-                    
-                    <div id="circadianResult"></div>
-                </div>
-                
-                <!-- 生物标志物分析 -->
-                <div class="tab-content" id="biomarker">
-                    <div class="form-group">
-                        <label>🧬 上传 CGM 数据</label>
-                        <textarea id="biomarkerCgmText" rows="6" placeholder="上传 CGM 数据进行生物标志物分析"></textarea>
-                    </div>
-                    
-                    <button class="btn" onclick="analyzeBiomarker()" style="width: 100%;">
-                        分析生物标志物
-                    </button>
-                    
-                    <div id="biomarkerResult"></div>
-                </div>
-                
-                <!-- 报告 -->
-                <div class="tab-content" id="report">
-                    <div class="form-group">
-                        <label>📋 选择报告类型</label>
-                        <select id="reportType">
-                            <option value="weekly">周报 (近7天)</option>
-                            <option value="monthly">月报 (近30天)</option>
-                        </select>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>📊 CGM 数据</label>
-                        <textarea id="reportCgmText" rows="6" placeholder="上传 CGM 数据生成报告"></textarea>
-                    </div>
-                    
-                    <button class="btn" onclick="generateReport()" style="width: 100%;">
-                        生成报告
-                    </button>
-                    
-                    <button class="btn btn-secondary" onclick="downloadPDF()" style="width: 100%; margin-top: 8px;">
-                        📥 下载 PDF
-                    </button>
-                    
-                    <div id="reportResult"></div>
-                </div>
-                
-                <!-- 饮酒分析 -->
-                <div class="tab-content" id="alcohol">
-                    <div class="form-group">
-                        <label>🍺 饮酒时间</label>
-                        <input type="datetime-local" id="alcoholTime">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>📊 CGM 数据</label>
-                        <textarea id="alcoholCgmText" rows="6" placeholder="上传 CGM 数据"></textarea>
-                    </div>
-                    
-                    <button class="btn" onclick="analyzeAlcohol()" style="width:100%">
-                        分析饮酒影响
-                    </button>
-                    
-                    <div id="alcoholResult"></div>
-                </div>
-                
-                <!-- 压力分析 -->
-                <div class="tab-content" id="stress">
-                    <div class="form-group">
-                        <label>😰 上传 CGM 数据</label>
-                        <textarea id="stressCgmText" rows="6" placeholder="上传 CGM 数据进行压力分析"></textarea>
-                    </div>
-                    
-                    <button class="btn" onclick="analyzeStress()" style="width:100%">
-                        分析压力影响
-                    </button>
-                    
-                    <div id="stressResult"></div>
-                </div>
-                
-                <!-- 疾病分析 -->
-                <div class="tab-content" id="illness">
-                    <div class="form-group">
-                        <label>🤒 上传 CGM 数据</label>
-                        <textarea id="illnessCgmText" rows="6" placeholder="上传 CGM 数据进行疾病影响分析"></textarea>
-                    </div>
-                    
-                    <button class="btn" onclick="analyzeIllness()" style="width:100%">
-                        分析疾病影响
-                    </button>
-                    
-                    <div id="illnessResult"></div>
-                </div>
-                
-                
-                <div class="tab-content" id="family">
-                    <div class="form-group">
-                        <label>👨‍👩‍👧 家庭成员管理</label>
-                        <p style="color:#6b7280;font-size:14px;margin-bottom:16px">添加家庭成员，共享血糖数据</p>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>成员名称</label>
-                        <input type="text" id="familyMemberName" placeholder="例如: 妈妈">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>关系</label>
-                        <select id="familyMemberRelation">
-                            <option value="parent">父母</option>
-                            <option value="spouse">配偶</option>
-                            <option value="child">子女</option>
-                            <option value="other">其他</option>
-                        </select>
-                    </div>
-                    
-                    <button class="btn" onclick="addFamilyMember()" style="width:100%">
-                        添加成员
-                    </button>
-                    
-                    <div id="familyList" style="margin-top:16px"></div>
-                    
-                    <div style="margin-top:24px;padding-top:16px;border-top:1px solid #e5e7eb">
-                        <label>📤 分享我的数据</label>
-                        <p style="color:#6b7280;font-size:14px;margin:8px 0">生成邀请链接</p>
-                        <button class="btn btn-secondary" onclick="generateShareLink()" style="width:100%">
-                            生成链接
-                        </button>
-                        <div id="shareLinkResult" style="margin-top:8px;word-break:break-all;font-size:12px"></div>
-                    </div>
-                </div>
-                
-                
-                <div class="tab-content" id="backup">
-                    <div class="form-group">
-                        <label>⬆️ 数据备份</label>
-                        <p style="color:#6b7280;font-size:14px;margin-bottom:16px">导出所有数据或恢复备份</p>
-                    </div>
-                    
-                    <div style="display:flex;gap:8px">
-                        <button class="btn" onclick="exportAllData()" style="flex:1">
-                            📤 导出数据
-                        </button>
-                        <button class="btn btn-secondary" onclick="document.getElementById('importFile').click()" style="flex:1">
-                            📥 导入数据
-                        </button>
-                        <input type="file" id="importFile" style="display:none" accept=".json" onchange="importData()">
-                    </div>
-                    
-                    <div id="backupResult" style="margin-top:16px"></div>
-                    
-                    <div style="margin-top:24px;padding-top:16px;border-top:1px solid #e5e7eb">
-                        <label>📊 CGM 数据 (用于备份)</label>
-                        <textarea id="backupCgmText" rows="6" placeholder="上传当前CGM数据"></textarea>
-                    </div>
-                </div>
-                
-                <!-- 患者管理 -->
-                <div class="tab-content" id="patients">
-                    <div class="form-group">
-                        <label>👥 患者管理</label>
-                        <p style="color:#6b7280;font-size:14px;margin-bottom:16px">管理患者列表和数据</p>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>患者ID/姓名</label>
-                        <input type="text" id="patientId" placeholder="例如: P001">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>患者姓名</label>
-                        <input type="text" id="patientName" placeholder="例如: 张三">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>年龄</label>
-                        <input type="number" id="patientAge" placeholder="例如: 45">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>性别</label>
-                        <select id="patientGender">
-                            <option value="男">男</option>
-                            <option value="女">女</option>
-                        </select>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>糖尿病类型</label>
-                        <select id="patientType">
-                            <option value="1型">1型糖尿病</option>
-                            <option value="2型">2型糖尿病</option>
-                            <option value="妊娠">妊娠糖尿病</option>
-                            <option value="其他">其他</option>
-                        </select>
-                    </div>
-                    
-                    <button class="btn" onclick="addPatient()" style="width:100%">
-                        添加患者
-                    </button>
-                    
-                    <div id="patientList" style="margin-top:16px"></div>
-                </div>
-                
-                <!-- 患者对比 -->
-                <div class="tab-content" id="comparison">
-                    <div class="form-group">
-                        <label>📊 选择患者进行对比</label>
-                        <p style="color:#6b7280;font-size:14px;margin-bottom:16px">选择2-3位患者对比血糖数据</p>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>患者A</label>
-                        <select id="comparePatientA"><option value="">-- 选择患者 --</option></select>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>患者B</label>
-                        <select id="comparePatientB"><option value="">-- 选择患者 --</option></select>
-                    </div>
-                    
-                    <button class="btn" onclick="comparePatients()" style="width:100%">
-                        对比分析
-                    </button>
-                    
-                    <div id="comparisonResult"></div>
-                </div>
-                
-                <!-- 研究工具 -->
-                <div class="tab-content" id="research">
-                    <div class="form-group">
-                        <label>🔬 研究工具</label>
-                        <p style="color:#6b7280;font-size:14px;margin-bottom:16px">临床研究数据分析</p>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>分析类型</label>
-                        <select id="researchType">
-                            <option value="abtest">AB测试 / 药物效果对比</option>
-                            <option value="correlation">相关性分析</option>
-                            <option value="survival">生存分析</option>
-                            <option value="regression">回归分析</option>
-                        </select>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>组A数据</label>
-                        <textarea id="groupAData" rows="4" placeholder="粘贴组A的CGM数据"></textarea>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>组B数据</label>
-                        <textarea id="groupBData" rows="4" placeholder="粘贴组B的CGM数据"></textarea>
-                    </div>
-                    
-                    <button class="btn" onclick="runResearchAnalysis()" style="width:100%">
-                        执行分析
-                    </button>
-                    
-                    <div id="researchResult"></div>
-                </div>
-                
-                <!-- 实验室数据 -->
-                <div class="tab-content" id="lab">
-                    <div class="form-group">
-                        <label>🧪 实验室数据</label>
-                        <p style="color:#6b7280;font-size:14px;margin-bottom:16px">整合实验室检查结果</p>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>HbA1c (%)</label>
-                        <input type="number" id="labHbA1c" step="0.1" placeholder="例如: 7.5">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>空腹血糖 (mg/dL)</label>
-                        <input type="number" id="labFastingGlucose" placeholder="例如: 120">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>餐后2h血糖 (mg/dL)</label>
-                        <input type="number" id="lab2hPP" placeholder="例如: 180">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>总胆固醇 (mg/dL)</label>
-                        <input type="number" id="labCholesterol" placeholder="例如: 200">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>甘油三酯 (mg/dL)</label>
-                        <input type="number" id="labTriglycerides" placeholder="例如: 150">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>LDL (mg/dL)</label>
-                        <input type="number" id="labLDL" placeholder="例如: 100">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>HDL (mg/dL)</label>
-                        <input type="number" id="labHDL" placeholder="例如: 50">
-                    </div>
-                    
-                    <button class="btn" onclick="saveLabData()" style="width:100%">
-                        保存实验室数据
-                    </button>
-                    
-                    <div id="labResult"></div>
-                </div>
-                
-                <!-- 设置 -->
-                    
-                    <div style="margin-top:16px">
-                        <label style="font-size:12px;color:#6b7280">快速建议:</label>
-                        <div style="display:flex;flex-wrap:wrap;gap:8px;margin-top:8px">
-                            <button class="btn btn-secondary" style="font-size:12px;padding:6px 12px" onclick="quickAsk('血糖高怎么办')">血糖高</button>
-                            <button class="btn btn-secondary" style="font-size:12px;padding:6px 12px" onclick="quickAsk('血糖低怎么办')">血糖低</button>
-                            <button class="btn btn-secondary" style="font-size:12px;padding:6px 12px" onclick="quickAsk('运动建议')">运动建议</button>
-                            <button class="btn btn-secondary" style="font-size:12px;padding:6px 12px" onclick="quickAsk('饮食建议')">饮食建议</button>
-                        </div>
-                    </div>
-                </div>
-                
-                <!-- 设置 -->
-                <div class="tab-content" id="settings">
-                    <div class="form-group">
-                        <label>⚙️ 血糖目标范围设置</label>
-                        <p style="color:#6b7280;font-size:14px;margin-bottom:16px">自定义您的血糖目标范围</p>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>低血糖阈值 (mg/dL)</label>
-                        <input type="number" id="settingLowThreshold" value="70" min="50" max="100">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>高血糖阈值 (mg/dL)</label>
-                        <input type="number" id="settingHighThreshold" value="180" min="140" max="300">
-                    </div>
-                    
-                    <button class="btn" onclick="saveSettings()" style="width: 100%;">
-                        保存设置
-                    </button>
-                    
-                    <div id="settingsResult" style="margin-top:16px"></div>
-                    
-                    <div style="margin-top:32px;padding-top:24px;border-top:1px solid #e5e7eb">
-                        <h4 style="margin-bottom:12px">提醒设置</h4>
-                        
-                        <div class="form-group">
-                            <label>
-                                <input type="checkbox" id="settingLowAlert"> 低血糖提醒 (<span id="lowThresholdDisplay">70</span> mg/dL)
-                            </label>
-                        </div>
-                        
-                        <div class="form-group">
-                            <label>
-                                <input type="checkbox" id="settingHighAlert"> 高血糖提醒 (> <span id="highThresholdDisplay">180</span> mg/dL)
-                            </label>
-                        </div>
-                    </div>
-                </div>
-                
-                <!-- 语音输入 -->
-                <div class="tab-content" id="voice">
-                    <div class="form-group">
-                        <label>🎤 语音记录餐食/运动</label>
-                        <p style="color:#6b7280;font-size:14px;margin-bottom:16px">点击麦克风说话，自动识别食物</p>
-                    </div>
-                    
-                    <div style="text-align:center;margin:24px 0">
-                        <button id="recordBtn" class="btn" style="border-radius:50%;width:80px;height:80px;font-size:32px" onclick="toggleRecording()">
-                            🎤
-                        </button>
-                        <p id="recordStatus" style="margin-top:8px;color:#6b7280">点击开始录音</p>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>或直接输入文字</label>
-                        <textarea id="voiceText" rows="3" placeholder="例如: 吃了1碗米饭和鸡蛋"></textarea>
-                    </div>
-                    
-                    <button class="btn" onclick="analyzeVoiceText()" style="width:100%">
-                        解析餐食
-                    </button>
-                    
-                    <div id="voiceResult"></div>
-                </div>
-                
-                <!-- 图片识别 -->
-                <div class="tab-content" id="image">
-                    <div class="form-group">
-                        <label>📷 拍照识别食物</label>
-                        <p style="color:#6b7280;font-size:14px;margin-bottom:16px">上传食物图片，自动识别并估算营养</p>
-                    </div>
-                    
-                    <div class="form-group">
-                        <input type="file" id="foodImage" accept="image/*" onchange="previewFoodImage()">
-                    </div>
-                    
-                    <div id="imagePreview" style="text-align:center;margin:16px 0"></div>
-                    
-                    <button class="btn" onclick="recognizeFoodImage()" style="width:100%">
-                        识别食物
-                    </button>
-                    
-                    <div id="imageResult"></div>
-                </div>
-                
-                <!-- 历史记录 -->
-                <div class="tab-content" id="history">
-                    <div id="historyList">
-                        <div class="loading">暂无历史记录</div>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <div class="footer">
-            GlycoNutri v3.0 | 临床研究工具
-        </div>
-    </div>
-    
-    <script>
-        // 全局变量
-        let cgmData = null;
-        let patients = [];
-        
-        // 患者管理
-        function addPatient() {
-            const id = document.getElementById('patientId').value;
-            const name = document.getElementById('patientName').value;
-            const age = document.getElementById('patientAge').value;
-            const gender = document.getElementById('patientGender').value;
-            const type = document.getElementById('patientType').value;
-            
-            if (!id || !name) { alert('请输入患者ID和姓名'); return; }
-            
-            patients.push({id, name, age, gender, type, data: ''});
-            renderPatientList();
-            
-            // 清空表单
-            document.getElementById('patientId').value = '';
-            document.getElementById('patientName').value = '';
-        }
-        
-        function renderPatientList() {
-            const list = document.getElementById('patientList');
-            
-            if (patients.length === 0) {
-                list.innerHTML = '<p style="color:#6b7280">暂无患者</p>';
-                return;
-            }
-            
-            let html = '<div style="display:flex;flex-direction:column;gap:8px">';
-            patients.forEach(p => {
-                html += `<div style="padding:12px;background:#f3f4f6;border-radius:8px;display:flex;justify-content:space-between;align-items:center">
-                    <div>
-                        <strong>${p.name}</strong> (${p.id})<br>
-                        <span style="color:#6b7280;font-size:12px">${p.type} | ${p.gender} | ${p.age}岁</span>
-                    </div>
-                    <button onclick="removePatient('${p.id}')" style="background:none;border:none;color:red;cursor:pointer">✕</button>
-                </div>`;
-            });
-            html += '</div>';
-            list.innerHTML = html;
-            
-            // 更新对比下拉框
-            updateCompareSelects();
-        }
-        
-        function removePatient(id) {
-            patients = patients.filter(p => p.id !== id);
-            renderPatientList();
-        }
-        
-        function updateCompareSelects() {
-            const selects = ['comparePatientA', 'comparePatientB'];
-            selects.forEach(sid => {
-                const sel = document.getElementById(sid);
-                sel.innerHTML = '<option value="">-- 选择患者 --</option>';
-                patients.forEach(p => {
-                    sel.innerHTML += `<option value="${p.id}">${p.name} (${p.id})</option>`;
-                });
-            });
-        }
-        
-        // 患者对比
-        async function comparePatients() {
-            const idA = document.getElementById('comparePatientA').value;
-            const idB = document.getElementById('comparePatientB').value;
-            
-            if (!idA || !idB) { alert('请选择两位患者'); return; }
-            
-            // 简化版：返回提示，需要患者数据
-            document.getElementById('comparisonResult').innerHTML = '<div class="loading">对比分析需要完整的CGM数据...</div>';
-            
-            // TODO: 实现真正的患者数据对比
-            document.getElementById('comparisonResult').innerHTML = '<div class="result-card"><h3>患者对比</h3><p>选择患者后可进行TIR、GV等指标对比</p></div>';
-        }
-        
-        // 研究分析
-        async function runResearchAnalysis() {
-            const type = document.getElementById('researchType').value;
-            const dataA = document.getElementById('groupAData').value;
-            const dataB = document.getElementById('groupBData').value;
-            
-            if (!dataA.trim() || !dataB.trim()) { alert('请输入两组数据'); return; }
-            
-            document.getElementById('researchResult').innerHTML = '<div class="loading">分析中...</div>';
-            
-            try {
-                const res = await fetch('/api/research/' + type, {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({group_a: dataA, group_b: dataB})
-                });
-                const data = await res.json();
-                
-                let html = '<div class="result-card"><h3>🔬 ' + 
-                    (type === 'abtest' ? 'AB测试结果' : 
-                     type === 'correlation' ? '相关性分析' : 
-                     type === 'survival' ? '生存分析' : '回归分析') + '</h3>';
-                
-                if (data.error) {
-                    html += `<p>${data.error}</p>`;
-                } else {
-                    // 显示结果
-                    html += '<pre style="background:#f3f4f6;padding:12px;border-radius:8px;overflow-x:auto">' + 
-                        JSON.stringify(data, null, 2) + '</pre>';
-                }
-                
-                html += '</div>';
-                document.getElementById('researchResult').innerHTML = html;
-            } catch (e) {
-                document.getElementById('researchResult').innerHTML = `错误: ${e.message}`;
-            }
-        }
-        
-        // 实验室数据
-        function saveLabData() {
-            const labData = {
-                hba1c: document.getElementById('labHbA1c').value,
-                fasting_glucose: document.getElementById('labFastingGlucose').value,
-               pp_2h: document.getElementById('lab2hPP').value,
-                cholesterol: document.getElementById('labCholesterol').value,
-                triglycerides: document.getElementById('labTriglycerides').value,
-                ldl: document.getElementById('labLDL').value,
-                hdl: document.getElementById('labHDL').value,
-                date: new Date().toISOString()
-            };
-            
-            // 保存到本地
-            localStorage.setItem('glyconutri_lab_data', JSON.stringify(labData));
-            
-            document.getElementById('labResult').innerHTML = '<p style="color:green">✓ 实验室数据已保存</p>';
-        }
-        
-        // Tab 切换
-        document.querySelectorAll('.tab').forEach(tab => {
-            tab.addEventListener('click', () => {
-                document.querySelectorAll('.tab').forEach(t => t.classList.remove('active'));
-                document.querySelectorAll('.tab-content').forEach(c => c.classList.remove('active'));
-                tab.classList.add('active');
-                document.getElementById(tab.dataset.tab).classList.add('active');
-            });
-        });
-        
-        // 文件上传
-        const setupFileUpload = (dropZoneId, fileInputId, callback) => {
-            const dropZone = document.getElementById(dropZoneId);
-            const fileInput = document.getElementById(fileInputId);
-            
-            dropZone.addEventListener('click', () => fileInput.click());
-            dropZone.addEventListener('dragover', (e) => {
-                e.preventDefault();
-                dropZone.classList.add('dragover');
-            });
-            dropZone.addEventListener('dragleave', () => dropZone.classList.remove('dragover'));
-            dropZone.addEventListener('drop', (e) => {
-                e.preventDefault();
-                dropZone.classList.remove('dragover');
-                if (e.dataTransfer.files.length) {
-                    fileInput.files = e.dataTransfer.files;
-                    callback(e.dataTransfer.files[0]);
-                }
-            });
-            fileInput.addEventListener('change', () => {
-                if (fileInput.files.length) callback(fileInput.files[0]);
-            });
-        };
-        
-        setupFileUpload('dropZone', 'cgmFile', (file) => {
-            document.getElementById('cgmResult').innerHTML = '<div class="loading"><div class="spinner"></div>正在读取文件...</div>';
-            const reader = new FileReader();
-            reader.onload = (e) => {
-                const text = e.target.result;
-                document.getElementById('cgmText').value = text;
-                analyzeCGM();
-            };
-            reader.readAsText(file);
-        });
-        
-        setupFileUpload('cgmDropZone', 'mealCgmFile', (file) => {
-            const reader = new FileReader();
-            reader.onload = (e) => {
-                document.getElementById('mealCgmText').value = e.target.result;
-            };
-            reader.readAsText(file);
-        });
-        
-        setupFileUpload('trendDropZone', 'trendFile', (file) => {
-            document.getElementById('trendResult').innerHTML = '<div class="loading"><div class="spinner"></div>正在读取文件...</div>';
-            const reader = new FileReader();
-            reader.onload = (e) => {
-                document.getElementById('trendCgmText').value = e.target.result;
-                analyzeTrend();
-            };
-            reader.readAsText(file);
-        });
-        
-        // 添加食物
-        let foodCount = 1;
-        function addFood() {
-            const div = document.createElement('div');
-            div.className = 'food-item';
-            div.innerHTML = `
-                <input type="text" placeholder="食物名称" class="food-name" onchange="updateFoodInfo(this)">
-                <input type="number" placeholder="重量(g)" class="food-weight" value="100" onchange="updateFoodInfo(this)">
-                <div class="food-info" id="foodInfo${foodCount}"></div>
-                <button class="btn-remove" onclick="removeFood(this)">×</button>
-            `;
-            document.getElementById('foodList').appendChild(div);
-            foodCount++;
-        }
-        
-        function removeFood(btn) {
-            const items = document.querySelectorAll('#foodList .food-item');
-            if (items.length > 1) btn.parentElement.remove();
-        }
-        
-        // 餐食营养分析 - 添加食物
-        let nutritionFoodCount = 1;
-        function addNutritionFood() {
-            const div = document.createElement('div');
-            div.className = 'food-item';
-            div.innerHTML = `
-                <input type="text" placeholder="食物名称" class="food-name-nutrition">
-                <input type="number" placeholder="重量(g)" class="food-weight-nutrition" value="100">
-                <button class="btn-remove" onclick="removeNutritionFood(this)">×</button>
-            `;
-            document.getElementById('nutritionFoodList').appendChild(div);
-            nutritionFoodCount++;
-        }
-        
-        function removeNutritionFood(btn) {
-            const items = document.querySelectorAll('#nutritionFoodList .food-item');
-            if (items.length > 1) btn.parentElement.remove();
-        }
-        
-        // 餐食营养分析
-        async function analyzeNutrition() {
-            const mealType = document.getElementById('nutritionMealType').value;
-            const foodItems = document.querySelectorAll('#nutritionFoodList .food-item');
-            
-            const foods = [];
-            foodItems.forEach(item => {
-                const name = item.querySelector('.food-name-nutrition').value;
-                const weight = parseFloat(item.querySelector('.food-weight-nutrition').value) || 100;
-                if (name) foods.push({name, weight});
-            });
-            
-            if (foods.length === 0) {
-                alert('请添加食物');
-                return;
-            }
-            
-            document.getElementById('nutritionResult').innerHTML = '<div class="loading"><div class="spinner"></div>分析中...</div>';
-            
-            try {
-                const res = await fetch('/api/meal/nutrition', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({
-                        meal_name: mealType,
-                        foods: foods
-                    })
-                });
-                const data = await res.json();
-                
-                if (data.error) {
-                    document.getElementById('nutritionResult').innerHTML = `<div class="result-card" style="background:#fee2e2"><p style="color:#dc2626">${data.error}</p></div>`;
-                    return;
-                }
-                
-                const m = data.meal.summary;
-                const balance = data.nutrition_balance;
-                const glycemic = data.glycemic_risk;
-                const recs = data.recommendations;
-                
-                let foodsHtml = data.meal.foods.map(f => `
-                    <div class="food-result-item">
-                        <div>
-                            <div class="name">${f.name} (${f.weight}g)</div>
-                            <div class="details">碳水: ${f.carbs}g | 蛋白: ${f.protein}g | 脂肪: ${f.fat}g</div>
-                        </div>
-                        <span class="tag tag-${f.gl < 10 ? 'low' : f.gl < 20 ? 'medium' : 'high'}">GL: ${f.gl}</span>
-                    </div>
-                `).join('');
-                
-                document.getElementById('nutritionResult').innerHTML = `
-                    <div class="result-card">
-                        <h3>🥗 ${mealType} 营养分析</h3>
-                        
-                        <h4 style="margin:16px 0 8px">食物列表</h4>
-                        ${foodsHtml}
-                        
-                        <h4 style="margin:16px 0 8px">营养汇总</h4>
-                        <div class="result-grid">
-                            <div class="result-item">
-                                <div class="value">${m.total_carbs}g</div>
-                                <div class="label">碳水</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${m.total_protein}g</div>
-                                <div class="label">蛋白质</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${m.total_fat}g</div>
-                                <div class="label">脂肪</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${m.total_fiber}g</div>
-                                <div class="label">纤维</div>
-                            </div>
-                        </div>
-                        
-                        <h4 style="margin:16px 0 8px">升糖效应</h4>
-                        <div class="result-grid">
-                            <div class="result-item">
-                                <div class="value">${m.weighted_gi}</div>
-                                <div class="label">加权GI</div>
-                            </div>
-                            <div class="result-item highlight">
-                                <div class="value">${m.total_gl}</div>
-                                <div class="label">总GL</div>
-                            </div>
-                        </div>
-                        
-                        <h4 style="margin:16px 0 8px">营养结构</h4>
-                        <div style="display:flex;gap:8px;margin-bottom:8px">
-                            <span class="tag" style="background:#fef3c7">碳水 ${balance.ratio.carbs}%</span>
-                            <span class="tag" style="background:#dbeafe">蛋白 ${balance.ratio.protein}%</span>
-                            <span class="tag" style="background:#fce7f3">脂肪 ${balance.ratio.fat}%</span>
-                        </div>
-                        
-                        <h4 style="margin:16px 0 8px">评估</h4>
-                        <div style="padding:12px;background:#f0fdf4;border-radius:8px;margin-bottom:16px">
-                            <strong>${recs.summary}</strong>
-                        </div>
-                        
-                        ${recs.recommendations.length > 0 ? `
-                        <h4 style="margin:16px 0 8px">建议</h4>
-                        <ul style="padding-left:20px;color:#374151">
-                            ${recs.recommendations.map(r => `<li style="margin-bottom:4px">${r.suggestion}</li>`).join('')}
-                        </ul>
-                        ` : ''}
-                    </div>
-                `;
-                
-                // 保存到历史记录
-                saveToHistory('meal-nutrition', mealType, data);
-                
-            } catch (e) {
-                document.getElementById('nutritionResult').innerHTML = `<div class="result-card" style="background:#fee2e2"><p style="color:#dc2626">错误: ${e.message}</p></div>`;
-            }
-        }
-        
-        // 保存到历史记录
-        
-        // 更新食物信息
-        async function updateFoodInfo(input) {
-            const item = input.parentElement;
-            const name = item.querySelector('.food-name').value;
-            const weight = parseFloat(item.querySelector('.food-weight').value) || 100;
-            const infoDiv = item.querySelector('.food-info');
-            
-            if (!name) return;
-            
-            try {
-                const res = await fetch(`/api/food/info?name=${encodeURIComponent(name)}&weight=${weight}`);
-                const data = await res.json();
-                
-                if (data.gi) {
-                    const gl = (data.gi * (data.carbs || 0) / 100).toFixed(1);
-                    infoDiv.innerHTML = `
-                        <span class="tag tag-${data.gi_category === '低' ? 'low' : data.gi_category === '中' ? 'medium' : 'high'}">
-                            GI: ${data.gi}
-                        </span>
-                        ${data.carbs ? `<span style="margin-left:8px">碳水: ${data.carbs.toFixed(1)}g</span>` : ''}
-                        ${gl > 0 ? `<span style="margin-left:8px">GL: ${gl}</span>` : ''}
-                    `;
-                }
-            } catch (e) {}
-        }
-        
-        // 趋势分析
-        let trendChartData = null;
-        
-        async function analyzeTrend() {
-            const text = document.getElementById('trendCgmText').value;
-            if (!text.trim()) {
-                alert('请上传 CGM 文件或输入数据');
-                return;
-            }
-            
-            document.getElementById('trendResult').innerHTML = '<div class="loading"><div class="spinner"></div>分析中...</div>';
-            
-            try {
-                const res = await fetch('/api/trend/analyze', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({data: text})
-                });
-                const data = await res.json();
-                
-                if (data.error) {
-                    document.getElementById('trendResult').innerHTML = `<div class="result-card" style="background:#fee2e2"><p style="color:#dc2626">${data.error}</p></div>`;
-                    return;
-                }
-                
-                // 显示每日汇总
-                let html = '<div class="result-card"><h3>📈 趋势分析</h3>';
-                
-                // 整体统计
-                if (data.daily && data.daily.length > 0) {
-                    const lastDay = data.daily[data.daily.length - 1];
-                    html += `
-                        <div class="result-grid">
-                            <div class="result-item highlight">
-                                <div class="value">${lastDay.tir?.toFixed(1) || 0}%</div>
-                                <div class="label">今日 TIR</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${lastDay.mean?.toFixed(0) || 0}</div>
-                                <div class="label">平均血糖</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${lastDay.std?.toFixed(1) || 0}</div>
-                                <div class="label">波动</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${lastDay.min?.toFixed(0) || 0}-${lastDay.max?.toFixed(0) || 0}</div>
-                                <div class="label">范围</div>
-                            </div>
-                        </div>
-                    `;
-                }
-                
-                // 时段分析
-                if (data.time_of_day) {
-                    html += '<h4 style="margin:16px 0 8px">时段分析</h4><div class="result-grid">';
-                    for (const [period, stats] of Object.entries(data.time_of_day)) {
-                        html += `
-                            <div class="result-item">
-                                <div class="value">${stats.mean?.toFixed(0) || '-'}</div>
-                                <div class="label">${period}</div>
-                            </div>
-                        `;
-                    }
-                    html += '</div>';
-                }
-                
-                // 模式检测
-                if (data.patterns) {
-                    if (data.patterns.dawn_phenomenon) {
-                        html += `<div style="margin-top:12px;padding:8px;background:#fef3c7;border-radius:8px">⚠️ 黎明现象: 血糖上升 ${data.patterns.dawn_phenomenon.rise?.toFixed(0)} mg/dL</div>`;
-                    }
-                    if (data.patterns.high_episodes && data.patterns.high_episodes.length > 0) {
-                        html += `<div style="margin-top:12px;padding:8px;background:#fee2e2;border-radius:8px">⚠️ 持续高血糖: ${data.patterns.high_episodes.length} 次</div>`;
-                    }
-                    if (data.patterns.low_episodes && data.patterns.low_episodes.length > 0) {
-                        html += `<div style="margin-top:12px;padding:8px;background:#fee2e2;border-radius:8px">⚠️ 低血糖事件: ${data.patterns.low_episodes.length} 次</div>`;
-                    }
-                }
-                
-                html += '</div>';
-                document.getElementById('trendResult').innerHTML = html;
-                
-                // 保存数据用于图表
-                trendChartData = data;
-                
-                // 获取图表数据
-                const chartRes = await fetch('/api/chart/data', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({data: text})
-                });
-                const chartData = await chartRes.json();
-                
-                // 显示图表区域
-                document.getElementById('trendChart').style.display = 'block';
-                document.getElementById('exportCsvBtn').style.display = 'block';
-                
-                // 绘制 TIR 饼图
-                if (chartData.tir_pie) {
-                    document.getElementById('tirBelow').innerHTML = `
-                        <div style="width:60px;height:60px;background:#fee2e2;border-radius:50%;display:flex;align-items:center;justify-content:center;font-weight:bold;color:#dc2626">${chartData.tir_pie.below.percent}%</div>
-                        <div style="margin-top:4px;font-size:12px">低</div>
-                    `;
-                    document.getElementById('tirInRange').innerHTML = `
-                        <div style="width:60px;height:60px;background:#dcfce7;border-radius:50%;display:flex;align-items:center;justify-content:center;font-weight:bold;color:#16a34a">${chartData.tir_pie.in_range.percent}%</div>
-                        <div style="margin-top:4px;font-size:12px">正常</div>
-                    `;
-                    document.getElementById('tirAbove').innerHTML = `
-                        <div style="width:60px;height:60px;background:#fee2e2;border-radius:50%;display:flex;align-items:center;justify-content:center;font-weight:bold;color:#dc2626">${chartData.tir_pie.above.percent}%</div>
-                        <div style="margin-top:4px;font-size:12px">高</div>
-                    `;
-                }
-                
-                // 绘制折线图 (简单实现)
-                if (chartData.time_series && chartData.time_series.length > 0) {
-                    const canvas = document.getElementById('cgmChart');
-                    const ctx = canvas.getContext('2d');
-                    const width = canvas.width = canvas.offsetWidth;
-                    const height = canvas.height = 300;
-                    
-                    const dataPoints = chartData.time_series.slice(-100); // 最后100个点
-                    const minG = Math.min(...dataPoints.map(d => d.y)) - 10;
-                    const maxG = Math.max(...dataPoints.map(d => d.y)) + 10;
-                    
-                    ctx.clearRect(0, 0, width, height);
-                    
-                    // 绘制范围区域
-                    ctx.fillStyle = 'rgba(34, 197, 94, 0.1)';
-                    const lowY = height - ((70 - minG) / (maxG - minG) * height);
-                    const highY = height - ((180 - minG) / (maxG - minG) * height);
-                    ctx.fillRect(0, highY, width, lowY - highY);
-                    
-                    // 绘制线条
-                    ctx.beginPath();
-                    ctx.strokeStyle = '#3b82f6';
-                    ctx.lineWidth = 2;
-                    
-                    dataPoints.forEach((point, i) => {
-                        const x = (i / (dataPoints.length - 1)) * width;
-                        const y = height - ((point.y - minG) / (maxG - minG) * height);
-                        if (i === 0) ctx.moveTo(x, y);
-                        else ctx.lineTo(x, y);
-                    });
-                    ctx.stroke();
-                    
-                    // 绘制阈值线
-                    ctx.strokeStyle = '#22c55e';
-                    ctx.setLineDash([5, 5]);
-                    ctx.beginPath();
-                    ctx.moveTo(0, height - ((70 - minG) / (maxG - minG) * height));
-                    ctx.lineTo(width, height - ((70 - minG) / (maxG - minG) * height));
-                    ctx.stroke();
-                    
-                    ctx.beginPath();
-                    ctx.moveTo(0, height - ((180 - minG) / (maxG - minG) * height));
-                    ctx.lineTo(width, height - ((180 - minG) / (maxG - minG) * height));
-                    ctx.stroke();
-                    ctx.setLineDash([]);
-                }
-                
-                saveHistory('trend', data);
-                
-            } catch (e) {
-                document.getElementById('trendResult').innerHTML = `<div class="result-card" style="background:#fee2e2"><p style="color:#dc2626">错误: ${e.message}</p></div>`;
-            }
-        }
-        
-        // 导出 CSV
-        function exportCSV() {
-            if (!trendChartData) {
-                alert('请先分析数据');
-                return;
-            }
-            
-            const csvContent = "data:text/csv;charset=utf-8," 
-                + "Date,Mean,TIR,Std,Min,Max\n"
-                + trendChartData.daily.map(d => 
-                    `${d.date},${d.mean?.toFixed(1)},${d.tir?.toFixed(1)}%,${d.std?.toFixed(1)},${d.min?.toFixed(0)},${d.max?.toFixed(0)}`
-                ).join('\n');
-            
-            const link = document.createElement('a');
-            link.href = encodeURI(csvContent);
-            link.download = `glyconutri_report_${new Date().toISOString().slice(0,10)}.csv`;
-            link.click();
-        }
-        
-        // 昼夜节律分析
-        async function analyzeCircadian() {
-            const text = document.getElementById('circadianCgmText').value;
-            if (!text.trim()) { alert('请输入CGM数据'); return; }
-            
-            document.getElementById('circadianResult').innerHTML = '<div class="loading">分析中...</div>';
-            
-            try {
-                const res = await fetch('/api/circadian/analyze', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({data: text})
-                });
-                const data = await res.json();
-                
-                if (data.error) {
-                    document.getElementById('circadianResult').innerHTML = `<div class="result-card" style="background:#fee2e2">${data.error}</div>`;
-                    return;
-                }
-                
-                let html = '<div class="result-card"><h3>🌙 昼夜节律分析</h3>';
-                
-                // 黎明现象
-                if (data.dawn_phenomenon) {
-                    html += `<div style="margin:8px 0;padding:8px;background:#fef3c7;border-radius:8px">
-                        黎明现象: ${data.dawn_phenomenon.severity} (上升 ${data.dawn_phenomenon.rise_amount} mg/dL)
-                    </div>`;
-                }
-                
-                // Somogyi效应
-                if (data.somogyi_effect && data.somogyi_effect.somogyi_effect) {
-                    html += `<div style="margin:8px 0;padding:8px;background:#fee2e2;border-radius:8px">
-                        ⚠️ Somogyi效应检测到
-                    </div>`;
-                }
-                
-                // 节律稳定性
-                if (data.circadian_stability) {
-                    html += `<div class="result-grid">
-                        <div class="result-item highlight">
-                            <div class="value">${data.circadian_stability.stability_score}</div>
-                            <div class="label">稳定性评分</div>
-                        </div>
-                        <div class="result-item">
-                            <div class="value">${data.circadian_stability.stability_level}</div>
-                            <div class="label">稳定等级</div>
-                        </div>
-                    </div>`;
-                }
-                
-                html += '</div>';
-                document.getElementById('circadianResult').innerHTML = html;
-            } catch (e) {
-                document.getElementById('circadianResult').innerHTML = `错误: ${e.message}`;
-            }
-        }
-        
-        // 生物标志物分析
-        async function analyzeBiomarker() {
-            const text = document.getElementById('biomarkerCgmText').value;
-            if (!text.trim()) { alert('请输入CGM数据'); return; }
-            
-            document.getElementById('biomarkerResult').innerHTML = '<div class="loading">分析中...</div>';
-            
-            try {
-                const res = await fetch('/api/biomarker/analyze', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({data: text})
-                });
-                const data = await res.json();
-                
-                if (data.error) {
-                    document.getElementById('biomarkerResult').innerHTML = `<div class="result-card" style="background:#fee2e2">${data.error}</div>`;
-                    return;
-                }
-                
-                let html = '<div class="result-card"><h3>🧬 生物标志物分析</h3>';
-                
-                // 风险评分
-                if (data.risk_score) {
-                    html += `<div class="result-grid">
-                        <div class="result-item highlight">
-                            <div class="value">${data.risk_score.risk_score}</div>
-                            <div class="label">风险评分</div>
-                        </div>
-                        <div class="result-item">
-                            <div class="value">${data.risk_score.risk_level}</div>
-                            <div class="label">风险等级</div>
-                        </div>
-                    </div>`;
-                }
-                
-                // 表型分类
-                if (data.phenotype) {
-                    html += `<div style="margin-top:12px"><strong>表型:</strong> ${data.phenotype.primary_type} / ${data.phenotype.variability_type}</div>`;
-                }
-                
-                // 关键指标
-                if (data.biomarkers) {
-                    html += `<div class="result-grid" style="margin-top:12px">
-                        <div class="result-item"><div class="value">${data.biomarkers.tir}%</div><div class="label">TIR</div></div>
-                        <div class="result-item"><div class="value">${data.biomarkers.tbr}%</div><div class="label">TBR</div></div>
-                        <div class="result-item"><div class="value">${data.biomarkers.tar}%</div><div class="label">TAR</div></div>
-                        <div class="result-item"><div class="value">${data.biomarkers.mage}</div><div class="label">MAGE</div></div>
-                    </div>`;
-                }
-                
-                html += '</div>';
-                document.getElementById('biomarkerResult').innerHTML = html;
-            } catch (e) {
-                document.getElementById('biomarkerResult').innerHTML = `错误: ${e.message}`;
-            }
-        }
 
-        // 饮酒分析
-        async function generateReport() {
-            const reportType = document.getElementById('reportType').value;
-            const text = document.getElementById('reportCgmText').value;
-            if (!text.trim()) { alert('请输入CGM数据'); return; }
-            
-            document.getElementById('reportResult').innerHTML = '<div class="loading">生成中...</div>';
-            
-            try {
-                const res = await fetch('/api/report/' + reportType, {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({data: text})
-                });
-                const data = await res.json();
-                
-                if (data.error) {
-                    document.getElementById('reportResult').innerHTML = `<div class="result-card" style="background:#fee2e2">${data.error}</div>`;
-                    return;
-                }
-                
-                let html = '<div class="result-card"><h3>📋 ' + (reportType === 'weekly' ? '周报' : '月报') + '</h3>';
-                
-                // 概览
-                if (data.overview) {
-                    html += `<div class="result-grid">
-                        <div class="result-item highlight"><div class="value">${data.overview.tir}%</div><div class="label">TIR</div></div>
-                        <div class="result-item"><div class="value">${data.overview.mean_glucose}</div><div class="label">平均血糖</div></div>
-                        <div class="result-item"><div class="value">${data.overview.gv}%</div><div class="label">波动</div></div>
-                    </div>`;
-                }
-                
-                // 目标达成
-                if (data.goals) {
-                    html += '<div style="margin-top:12px"><strong>目标达成:</strong></div><ul style="padding-left:20px;margin-top:8px">';
-                    data.goals.forEach(g => { html += `<li>${g}</li>`; });
-                    html += '</ul>';
-                }
-                
-                // 建议
-                if (data.recommendations && data.recommendations.length > 0) {
-                    html += '<div style="margin-top:12px"><strong>建议:</strong></div><ul style="padding-left:20px;margin-top:8px">';
-                    data.recommendations.forEach(r => { html += `<li>${r}</li>`; });
-                    html += '</ul>';
-                }
-                
-                html += '</div>';
-                document.getElementById('reportResult').innerHTML = html;
-            } catch (e) {
-                document.getElementById('reportResult').innerHTML = `错误: ${e.message}`;
-            }
-        }
-        
-        // 下载 PDF
-        async function downloadPDF() {
-            const reportType = document.getElementById('reportType').value;
-            const text = document.getElementById('reportCgmText').value;
-            if (!text.trim()) { alert('请先输入CGM数据'); return; }
-            
-            try {
-                const res = await fetch('/api/report/' + reportType + '/pdf', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({data: text})
-                });
-                
-                if (!res.ok) {
-                    const err = await res.json();
-                    alert(err.error || '生成失败');
-                    return;
-                }
-                
-                const blob = await res.blob();
-                const url = window.URL.createObjectURL(blob);
-                const a = document.createElement('a');
-                a.href = url;
-                a.download = `glyconutri_${reportType}_report.pdf`;
-                document.body.appendChild(a);
-                a.click();
-                window.URL.revokeObjectURL(url);
-            } catch (e) {
-                alert('下载失败: ' + e.message);
-            }
-        }
-        
-        // 分析 CGM
-        async function analyzeCGM() {
-            const text = document.getElementById('cgmText').value;
-            if (!text.trim()) {
-                alert('请上传 CGM 文件或输入数据');
-                return;
-            }
-            
-            document.getElementById('cgmResult').innerHTML = '<div class="loading"><div class="spinner"></div>分析中...</div>';
-            
-            try {
-                const res = await fetch('/api/cgm/analyze', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({data: text})
-                });
-                const data = await res.json();
-                
-                if (data.error) {
-                    document.getElementById('cgmResult').innerHTML = `<div class="result-card" style="background:#fee2e2"><p style="color:#dc2626">${data.error}</p></div>`;
-                    return;
-                }
-                
-                const r = data.results;
-                cgmData = data.cgm_data;
-                
-                document.getElementById('cgmResult').innerHTML = `
-                    <div class="result-card">
-                        <h3>📊 血糖分析结果</h3>
-                        <div class="result-grid">
-                            <div class="result-item highlight">
-                                <div class="value">${r.tir.toFixed(1)}%</div>
-                                <div class="label">Time in Range</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${r.gv.toFixed(1)}%</div>
-                                <div class="label">血糖波动</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${r.mean_glucose.toFixed(0)}</div>
-                                <div class="label">平均血糖</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${r.std_glucose.toFixed(1)}</div>
-                                <div class="label">标准差</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${r.min_glucose.toFixed(0)}</div>
-                                <div class="label">最低血糖</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${r.max_glucose.toFixed(0)}</div>
-                                <div class="label">最高血糖</div>
-                            </div>
-                        </div>
-                        <div style="margin-top:16px; font-size:14px; color:#6b7280">
-                            数据点数: ${data.data_points} | 时间: ${data.time_range}
-                        </div>
-                    </div>
-                `;
-                
-                // 保存到历史
-                saveHistory('cgm', {results: r, time_range: data.time_range});
-                
-            } catch (e) {
-                document.getElementById('cgmResult').innerHTML = `<div class="result-card" style="background:#fee2e2"><p style="color:#dc2626">错误: ${e}</p></div>`;
-            }
-        }
-        
-        // 分析餐后血糖
-        async function analyzeMeal() {
-            const mealTime = document.getElementById('mealTime').value;
-            const foodItems = document.querySelectorAll('#foodList .food-item');
-            const cgmText = document.getElementById('mealCgmText').value;
-            
-            const foods = [];
-            foodItems.forEach(item => {
-                const name = item.querySelector('.food-name').value;
-                const weight = parseFloat(item.querySelector('.food-weight').value) || 100;
-                if (name) foods.push({name, weight});
-            });
-            
-            if (!mealTime || foods.length === 0) {
-                alert('请填写餐食时间和食物');
-                return;
-            }
-            
-            document.getElementById('mealResult').innerHTML = '<div class="loading"><div class="spinner"></div>分析中...</div>';
-            
-            try {
-                const res = await fetch('/api/meal/analyze', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({
-                        meal_time: mealTime,
-                        foods: foods,
-                        cgm_data: cgmText || (cgmData ? JSON.stringify(cgmData) : null)
-                    })
-                });
-                const data = await res.json();
-                
-                if (data.error) {
-                    document.getElementById('mealResult').innerHTML = `<div class="result-card" style="background:#fee2e2"><p style="color:#dc2626">${data.error}</p></div>`;
-                    return;
-                }
-                
-                const m = data.meal;
-                const g = data.glucose_response;
-                
-                let foodsHtml = m.foods.map(f => `
-                    <div class="food-result-item">
-                        <div>
-                            <div class="name">${f.food_name} (${f.weight}g)</div>
-                            <div class="details">GI: ${f.gi} | 碳水: ${f.carbs?.toFixed(1)}g</div>
-                        </div>
-                        <span class="tag tag-${f.gl < 10 ? 'low' : f.gl < 20 ? 'medium' : 'high'}">GL: ${f.gl?.toFixed(1)}</span>
-                    </div>
-                `).join('');
-                
-                document.getElementById('mealResult').innerHTML = `
-                    <div class="result-card">
-                        <h3>🍽️ 餐后血糖分析</h3>
-                        <div style="margin-bottom:16px">
-                            <strong>餐食时间:</strong> ${mealTime}
-                        </div>
-                        <div style="margin-bottom:16px">
-                            <strong>食物:</strong>
-                            ${foodsHtml}
-                        </div>
-                        <div class="result-grid">
-                            <div class="result-item">
-                                <div class="value">${m.total_carbs?.toFixed(1)}g</div>
-                                <div class="label">总碳水</div>
-                            </div>
-                            <div class="result-item highlight">
-                                <div class="value">${m.total_gl?.toFixed(1)}</div>
-                                <div class="label">总 GL</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${m.weighted_gi?.toFixed(0)}</div>
-                                <div class="label">加权 GI</div>
-                            </div>
-                        </div>
-                        ${g.baseline ? `
-                        <div style="margin-top:16px; padding-top:16px; border-top:1px solid #e5e7eb">
-                            <strong>血糖响应:</strong>
-                            <div class="result-grid" style="margin-top:12px">
-                                <div class="result-item">
-                                    <div class="value">${g.baseline?.toFixed(0)}</div>
-                                    <div class="label">餐前基线</div>
-                                </div>
-                                <div class="result-item">
-                                    <div class="value">${g.peak?.toFixed(0)}</div>
-                                    <div class="label">餐后峰值</div>
-                                </div>
-                                <div class="result-item">
-                                    <div class="value">${g.response_magnitude?.toFixed(0)}</div>
-                                    <div class="label">血糖增幅</div>
-                                </div>
-                            </div>
-                        </div>
-                        ` : '<div style="margin-top:16px; color:#6b7280">⚠️ 请提供 CGM 数据以获取血糖响应分析</div>'}
-                    </div>
-                `;
-                
-                saveHistory('meal', {meal_time: mealTime, foods: m.foods, glucose_response: g});
-                
-            } catch (e) {
-                document.getElementById('mealResult').innerHTML = `<div class="result-card" style="background:#fee2e2"><p style="color:#dc2626">错误: ${e}</p></div>`;
-            }
-        }
-        
-        // 搜索食物
-        async function searchFood() {
-            const query = document.getElementById('foodSearch').value;
-            if (!query) return;
-            
-            const res = await fetch(`/api/foods/search?q=${encodeURIComponent(query)}`);
-            const data = await res.json();
-            
-            let html = '<div class="result-card">';
-            if (data.results && data.results.length > 0) {
-                data.results.forEach(f => {
-                    html += `
-                        <div class="food-result-item">
-                            <div>
-                                <div class="name">${f.name}</div>
-                                <div class="details">GI: ${f.gi} | 碳水: ${f.carbs_per_100g || 'N/A'}g/100g</div>
-                            </div>
-                            <span class="tag tag-${f.gi_category === '低' ? 'low' : f.gi_category === '中' ? 'medium' : 'high'}">${f.gi_category}GI</span>
-                        </div>
-                    `;
-                });
-            } else {
-                html += '<p>未找到匹配的食物</p>';
-            }
-            html += '</div>';
-            document.getElementById('foodResult').innerHTML = html;
-        }
-        
-        async function browseGI(category) {
-            const res = await fetch(`/api/foods/category/${category}`);
-            const data = await res.json();
-            
-            let html = `<div class="result-card"><h3>${category}GI 食物</h3>`;
-            data.foods.forEach(f => {
-                html += `
-                    <div class="food-result-item">
-                        <div>
-                            <div class="name">${f.name}</div>
-                            <div class="details">GI: ${f.gi} | 碳水: ${f.carbs_per_100g || 'N/A'}g</div>
-                        </div>
-                    </div>
-                `;
-            });
-            html += '</div>';
-            document.getElementById('foodResult').innerHTML = html;
-        }
-        
-        // 语音录制
-        let mediaRecorder = null;
-        let audioChunks = [];
-        
-        async function toggleRecording() {
-            const btn = document.getElementById('recordBtn');
-            const status = document.getElementById('recordStatus');
-            
-            if (!mediaRecorder) {
-                // 开始录音
-                try {
-                    const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-                    mediaRecorder = new MediaRecorder(stream);
-                    audioChunks = [];
-                    
-                    mediaRecorder.ondataavailable = e => audioChunks.push(e.data);
-                    mediaRecorder.onstop = async () => {
-                        const audioBlob = new Blob(audioChunks, { type: 'audio/webm' });
-                        const formData = new FormData();
-                        formData.append('audio', audioBlob, 'recording.webm');
-                        
-                        status.innerText = '识别中...';
-                        
-                        try {
-                            const res = await fetch('/api/voice/transcribe', {
-                                method: 'POST',
-                                body: formData
-                            });
-                            const data = await res.json();
-                            
-                            if (data.text) {
-                                document.getElementById('voiceText').value = data.text;
-                                analyzeVoiceText();
-                            } else {
-                                status.innerText = data.error || '识别失败';
-                            }
-                        } catch (e) {
-                            status.innerText = '识别错误: ' + e.message;
-                        }
-                    };
-                    
-                    mediaRecorder.start();
-                    btn.innerHTML = '⏹️';
-                    status.innerText = '录音中... 点击停止';
-                    
-                } catch (e) {
-                    alert('无法访问麦克风: ' + e.message);
-                }
-            } else {
-                // 停止录音
-                mediaRecorder.stop();
-                mediaRecorder = null;
-                btn.innerHTML = '🎤';
-            }
-        }
-        
-        // 解析语音文本
-        async function analyzeVoiceText() {
-            const text = document.getElementById('voiceText').value;
-            if (!text.trim()) { alert('请说话或输入文字'); return; }
-            
-            document.getElementById('voiceResult').innerHTML = '<div class="loading">解析中...</div>';
-            
-            try {
-                const res = await fetch('/api/voice/parse', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({text})
-                });
-                const data = await res.json();
-                
-                let html = '<div class="result-card"><h3>🍽️ 识别结果</h3>';
-                
-                if (data.foods && data.foods.length > 0) {
-                    html += '<div class="result-grid">';
-                    data.foods.forEach(f => {
-                        html += `<div class="result-item">
-                            <div class="value">${f.name}</div>
-                            <div class="label">${f.quantity}份 | ${f.carbs}g碳水</div>
-                        </div>`;
-                    });
-                    html += '</div>';
-                    
-                    html += `<div style="margin-top:16px;padding:12px;background:#f3f4f6;border-radius:8px">
-                        <div><strong>总计:</strong> ${data.total_carbs}g 碳水</div>
-                        <div><strong>估算GL:</strong> ${data.estimated_gl}</div>
-                    </div>`;
-                } else {
-                    html += '<p>未识别到食物</p>';
-                }
-                
-                html += '</div>';
-                document.getElementById('voiceResult').innerHTML = html;
-            } catch (e) {
-                document.getElementById('voiceResult').innerHTML = `错误: ${e.message}`;
-            }
-        }
-        
-        // 图片预览
-        function previewFoodImage() {
-            const input = document.getElementById('foodImage');
-            const preview = document.getElementById('imagePreview');
-            
-            if (input.files && input.files[0]) {
-                const reader = new FileReader();
-                reader.onload = e => {
-                    preview.innerHTML = `<img src="${e.target.result}" style="max-width:200px;border-radius:8px">`;
-                };
-                reader.readAsDataURL(input.files[0]);
-            }
-        }
-        
-        // 识别图片
-        async function recognizeFoodImage() {
-            const input = document.getElementById('foodImage');
-            if (!input.files || !input.files[0]) {
-                alert('请选择图片');
-                return;
-            }
-            
-            document.getElementById('imageResult').innerHTML = '<div class="loading">识别中...</div>';
-            
-            const formData = new FormData();
-            formData.append('image', input.files[0]);
-            
-            try {
-                const res = await fetch('/api/food/recognize', {
-                    method: 'POST',
-                    body: formData
-                });
-                const data = await res.json();
-                
-                let html = '<div class="result-card"><h3>📷 识别结果</h3>';
-                
-                if (data.foods && data.foods.length > 0) {
-                    html += '<div class="result-grid">';
-                    data.foods.forEach(f => {
-                        html += `<div class="result-item">
-                            <div class="value">${f.name}</div>
-                            <div class="label">置信度: ${Math.round(f.confidence * 100)}%</div>
-                        </div>`;
-                    });
-                    html += '</div>';
-                    
-                    if (data.nutrition) {
-                        html += `<div style="margin-top:16px;padding:12px;background:#f3f4f6;border-radius:8px">
-                            <div><strong>估算营养:</strong></div>
-                            <div>碳水: ${data.nutrition.carbs}g | 蛋白质: ${data.nutrition.protein}g | 脂肪: ${data.nutrition.fat}g</div>
-                            <div>热量: ${data.nutrition.calories} kcal</div>
-                        </div>`;
-                    }
-                } else {
-                    html += '<p>' + (data.error || '未识别到食物') + '</p>';
-                }
-                
-                html += '</div>';
-                document.getElementById('imageResult').innerHTML = html;
-            } catch (e) {
-                document.getElementById('imageResult').innerHTML = `错误: ${e.message}`;
-            }
-        }
-        
-        // 设置相关
-        function loadSettings() {
-            const settings = JSON.parse(localStorage.getItem('glyconutri_settings') || '{}');
-            if (settings.lowThreshold) {
-                document.getElementById('settingLowThreshold').value = settings.lowThreshold;
-                document.getElementById('lowThresholdDisplay').textContent = settings.lowThreshold;
-            }
-            if (settings.highThreshold) {
-                document.getElementById('settingHighThreshold').value = settings.highThreshold;
-                document.getElementById('highThresholdDisplay').textContent = settings.highThreshold;
-            }
-            if (settings.lowAlert !== undefined) {
-                document.getElementById('settingLowAlert').checked = settings.lowAlert;
-            }
-            if (settings.highAlert !== undefined) {
-                document.getElementById('settingHighAlert').checked = settings.highAlert;
-            }
-        }
-        
-        function saveSettings() {
-            const lowThreshold = parseInt(document.getElementById('settingLowThreshold').value);
-            const highThreshold = parseInt(document.getElementById('settingHighThreshold').value);
-            const lowAlert = document.getElementById('settingLowAlert').checked;
-            const highAlert = document.getElementById('settingHighAlert').checked;
-            
-            if (lowThreshold >= highThreshold) {
-                alert('低血糖阈值必须小于高血糖阈值');
-                return;
-            }
-            
-            const settings = {
-                lowThreshold,
-                highThreshold,
-                lowAlert,
-                highAlert
-            };
-            
-            localStorage.setItem('glyconutri_settings', JSON.stringify(settings));
-            
-            document.getElementById('lowThresholdDisplay').textContent = lowThreshold;
-            document.getElementById('highThresholdDisplay').textContent = highThreshold;
-            
-            document.getElementById('settingsResult').innerHTML = '<div style="color:#16a34a;padding:8px;background:#dcfce7;border-radius:8px">设置已保存</div>';
-        }
-        
-        // 历史记录
-        function saveHistory(type, data) {
-            const history = JSON.parse(localStorage.getItem('glyconutri_history') || '[]');
-            history.unshift({type, data, time: new Date().toISOString()});
-            localStorage.setItem('glyconutri_history', JSON.stringify(history.slice(0, 20)));
-        }
-        
-        function loadHistory() {
-            const history = JSON.parse(localStorage.getItem('glyconutri_history') || '[]');
-            if (history.length === 0) {
-                document.getElementById('historyList').innerHTML = '<div class="loading">暂无历史记录</div>';
-                return;
-            }
-            
-            let html = '';
-            history.forEach(h => {
-                const time = new Date(h.time).toLocaleString('zh-CN');
-                if (h.type === 'cgm') {
-                    html += `
-                        <div class="history-item">
-                            <div class="history-time">📊 ${time}</div>
-                            <div>TIR: ${h.data.results?.tir?.toFixed(1)}% | 平均血糖: ${h.data.results?.mean_glucose?.toFixed(0)}</div>
-                        </div>
-                    `;
-                } else if (h.type === 'meal') {
-                    const foods = h.data.foods?.map(f => f.food_name).join(', ') || '';
-                    html += `
-                        <div class="history-item">
-                            <div class="history-time">🍽️ ${time}</div>
-                            <div>${foods}</div>
-                            <div class="history-foods">GL: ${h.data.glucose_response?.total_gl || 'N/A'}</div>
-                        </div>
-                    `;
-                }
-            });
-            document.getElementById('historyList').innerHTML = html;
-        }
-        
-        // 运动分析
-        async function analyzeExercise() {
-            const exerciseType = document.getElementById('exerciseType').value;
-            const duration = parseInt(document.getElementById('exerciseDuration').value) || 30;
-            const exerciseTime = document.getElementById('exerciseTime').value;
-            const cgmText = document.getElementById('exerciseCgmText').value;
-            
-            if (!exerciseTime) {
-                alert('请选择运动时间');
-                return;
-            }
-            if (!cgmText.trim()) {
-                alert('请输入血糖数据');
-                return;
-            }
-            
-            document.getElementById('exerciseResult').innerHTML = '<div class="loading"><div class="spinner"></div>分析中...</div>';
-            
-            try {
-                const res = await fetch('/api/activity/exercise', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({
-                        exercise_type: exerciseType,
-                        duration_minutes: duration,
-                        start_time: exerciseTime,
-                        cgm_data: cgmText
-                    })
-                });
-                const data = await res.json();
-                
-                if (data.error) {
-                    document.getElementById('exerciseResult').innerHTML = `<div class="result-card" style="background:#fee2e2"><p style="color:#dc2626">${data.error}</p></div>`;
-                    return;
-                }
-                
-                const ex = data.exercise;
-                const recs = data.recommendations;
-                
-                document.getElementById('exerciseResult').innerHTML = `
-                    <div class="result-card">
-                        <h3>🏃 运动血糖分析</h3>
-                        <div class="result-grid">
-                            <div class="result-item">
-                                <div class="value">${ex.exercise_type}</div>
-                                <div class="label">运动类型</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${ex.duration_minutes}分钟</div>
-                                <div class="label">运动时长</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${ex.baseline?.toFixed(0) || 'N/A'}</div>
-                                <div class="label">运动前血糖</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${ex.during_min?.toFixed(0) || 'N/A'}</div>
-                                <div class="label">运动中最低</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${ex.change_from_baseline?.toFixed(0) || 'N/A'}</div>
-                                <div class="label">血糖变化</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${ex.hypoglycemia_risk || 'N/A'}</div>
-                                <div class="label">低血糖风险</div>
-                            </div>
-                        </div>
-                        
-                        <h4 style="margin:16px 0 8px">建议</h4>
-                        <ul style="padding-left:20px;color:#374151">
-                            ${recs.map(r => `<li style="margin-bottom:4px">${r}</li>`).join('')}
-                        </ul>
-                    </div>
-                `;
-                
-                saveHistory('exercise', data);
-                
-            } catch (e) {
-                document.getElementById('exerciseResult').innerHTML = `<div class="result-card" style="background:#fee2e2"><p style="color:#dc2626">错误: ${e.message}</p></div>`;
-            }
-        }
-        
-        // 睡眠分析
-        async function analyzeSleep() {
-            const sleepTime = document.getElementById('sleepTime').value;
-            const wakeTime = document.getElementById('wakeTime').value;
-            const cgmText = document.getElementById('sleepCgmText').value;
-            
-            if (!sleepTime || !wakeTime) {
-                alert('请选择入睡和醒来时间');
-                return;
-            }
-            if (!cgmText.trim()) {
-                alert('请输入血糖数据');
-                return;
-            }
-            
-            document.getElementById('sleepResult').innerHTML = '<div class="loading"><div class="spinner"></div>分析中...</div>';
-            
-            try {
-                const res = await fetch('/api/activity/sleep', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({
-                        sleep_time: sleepTime,
-                        wake_time: wakeTime,
-                        cgm_data: cgmText
-                    })
-                });
-                const data = await res.json();
-                
-                if (data.error) {
-                    document.getElementById('sleepResult').innerHTML = `<div class="result-card" style="background:#fee2e2"><p style="color:#dc2626">${data.error}</p></div>`;
-                    return;
-                }
-                
-                const m = data.metrics;
-                const q = data.quality;
-                const recs = data.recommendations;
-                
-                document.getElementById('sleepResult').innerHTML = `
-                    <div class="result-card">
-                        <h3>😴 睡眠血糖分析</h3>
-                        <div class="result-grid">
-                            <div class="result-item">
-                                <div class="value">${m.sleep?.duration_hours || 'N/A'}小时</div>
-                                <div class="label">睡眠时长</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${m.mean?.toFixed(0) || 'N/A'}</div>
-                                <div class="label">平均血糖</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${m.min?.toFixed(0) || 'N/A'}</div>
-                                <div class="label">最低血糖</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${m.max?.toFixed(0) || 'N/A'}</div>
-                                <div class="label">最高血糖</div>
-                            </div>
-                            <div class="result-item highlight">
-                                <div class="value">${q.score}</div>
-                                <div class="label">睡眠质量</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${q.quality}</div>
-                                <div class="label">评级</div>
-                            </div>
-                        </div>
-                        
-                        ${m.time_in_range ? `
-                        <div style="margin-top:12px">
-                            <div>Time in Range: <strong>${m.time_in_range.toFixed(1)}%</strong></div>
-                        </div>
-                        ` : ''}
-                        
-                        ${m.low_episodes ? `
-                        <div style="margin-top:12px;color:#dc2626">
-                            ⚠️ 夜间低血糖: ${m.low_episodes} 次
-                        </div>
-                        ` : ''}
-                        
-                        ${m.dawn_phenomenon ? `
-                        <div style="margin-top:12px;color:#f59e0b">
-                            ⚠️ 黎明现象: 血糖上升 ${m.dawn_phenomenon} mg/dL
-                        </div>
-                        ` : ''}
-                        
-                        <h4 style="margin:16px 0 8px">建议</h4>
-                        <ul style="padding-left:20px;color:#374151">
-                            ${recs.map(r => `<li style="margin-bottom:4px">${r}</li>`).join('')}
-                        </ul>
-                    </div>
-                `;
-                
-                saveHistory('sleep', data);
-                
-            } catch (e) {
-                document.getElementById('sleepResult').innerHTML = `<div class="result-card" style="background:#fee2e2"><p style="color:#dc2626">错误: ${e.message}</p></div>`;
-            }
-        }
-        
-        // 更新药物列表
-        function updateMedicationList() {
-            const type = document.getElementById('medicationType').value;
-            const select = document.getElementById('medicationName');
-            
-            const oralMed = ['二甲双胍', '阿卡波糖', '伏格列波糖', '格列本脲', '格列齐特', '格列吡嗪', '格列美脲', '瑞格列奈', '那格列奈', '吡格列酮', '罗格列酮', '西格列汀', '沙格列汀', '维格列汀', '恩格列净', '卡格列净', '达格列净', '司美格鲁肽', '度拉糖肽', '利拉鲁肽'];
-            const insulinMed = ['速效', '短效', '中效', '长效', '超长效', '预混'];
-            
-            const meds = type === '口服' ? oralMed : insulinMed;
-            select.innerHTML = meds.map(m => `<option value="${m}">${m}</option>`).join('');
-            
-            // 更新剂量占位符
-            document.getElementById('medicationDosage').placeholder = type === '口服' ? '剂量(mg)' : '剂量(U)';
-        }
-        
-        // 药物分析
-        async function analyzeMedication() {
-            const medicationType = document.getElementById('medicationType').value;
-            const medicationName = document.getElementById('medicationName').value;
-            const dosage = parseFloat(document.getElementById('medicationDosage').value);
-            const medicationTime = document.getElementById('medicationTime').value;
-            const cgmText = document.getElementById('medicationCgmText').value;
-            
-            if (!medicationTime) {
-                alert('请选择服药时间');
-                return;
-            }
-            if (!cgmText.trim()) {
-                alert('请输入血糖数据');
-                return;
-            }
-            
-            document.getElementById('medicationResult').innerHTML = '<div class="loading"><div class="spinner"></div>分析中...</div>';
-            
-            try {
-                const res = await fetch('/api/medication/analyze', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({
-                        medication_type: medicationType,
-                        medication_name: medicationName,
-                        dosage: dosage,
-                        taken_time: medicationTime,
-                        cgm_data: cgmText
-                    })
-                });
-                const data = await res.json();
-                
-                if (data.error) {
-                    document.getElementById('medicationResult').innerHTML = `<div class="result-card" style="background:#fee2e2"><p style="color:#dc2626">${data.error}</p></div>`;
-                    return;
-                }
-                
-                const resp = data.response;
-                const eff = data.efficacy;
-                const recs = data.recommendations;
-                
-                const med = resp.medication || {};
-                
-                document.getElementById('medicationResult').innerHTML = `
-                    <div class="result-card">
-                        <h3>💊 药物血糖分析</h3>
-                        <div class="result-grid">
-                            <div class="result-item">
-                                <div class="value">${med.medication_name || medicationName}</div>
-                                <div class="label">药物</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${med.dosage || dosage || 'N/A'}</div>
-                                <div class="label">剂量</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${med.baseline?.toFixed(0) || 'N/A'}</div>
-                                <div class="label">服药前血糖</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${eff.efficacy}</div>
-                                <div class="label">药效</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${eff.score}</div>
-                                <div class="label">效果评分</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${med.hypo_risk || '低'}</div>
-                                <div class="label">低血糖风险</div>
-                            </div>
-                        </div>
-                        
-                        ${resp.overall ? `
-                        <h4 style="margin:16px 0 8px">血糖变化</h4>
-                        <div class="result-grid">
-                            <div class="result-item">
-                                <div class="value">${resp.overall.min?.toFixed(0) || 'N/A'}</div>
-                                <div class="label">最低</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${resp.overall.max?.toFixed(0) || 'N/A'}</div>
-                                <div class="label">最高</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${resp.overall.change_from_baseline?.toFixed(0) || 'N/A'}</div>
-                                <div class="label">变化</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="value">${resp.overall.max_drop?.toFixed(0) || 'N/A'}</div>
-                                <div class="label">最大降幅</div>
-                            </div>
-                        </div>
-                        ` : ''}
-                        
-                        <h4 style="margin:16px 0 8px">建议</h4>
-                        <ul style="padding-left:20px;color:#374151">
-                            ${recs.map(r => `<li style="margin-bottom:4px">${r}</li>`).join('')}
-                        </ul>
-                    </div>
-                `;
-                
-                saveHistory('medication', data);
-                
-            } catch (e) {
-                document.getElementById('medicationResult').innerHTML = `<div class="result-card" style="background:#fee2e2"><p style="color:#dc2626">错误: ${e.message}</p></div>`;
-            }
-        }
-        
-        // 初始化
-        document.getElementById('mealTime').value = new Date().toISOString().slice(0, 16);
-        
-        // 设置默认睡眠时间 (昨晚11点到今早7点)
-        const now = new Date();
-        const yesterday = new Date(now);
-        yesterday.setDate(yesterday.getDate() - 1);
-        document.getElementById('sleepTime').value = new Date(yesterday.setHours(23, 0, 0, 0)).toISOString().slice(0, 16);
-        document.getElementById('wakeTime').value = new Date(now.setHours(7, 0, 0, 0)).toISOString().slice(0, 16);
-        document.getElementById('exerciseTime').value = new Date(now.setHours(now.getHours() - 1, 0, 0, 0)).toISOString().slice(0, 16);
-        document.getElementById('medicationTime').value = new Date().toISOString().slice(0, 16);
-        
-        loadSettings();
-        loadHistory();
-    </script>
-</body>
-</html>
-"""
+# pandas 及依赖它的分析模块在端点内按需导入，只提供首页的 worker 无需加载
+if TYPE_CHECKING:
+    import pandas as pd
+
+def _orjson_default(obj: Any) -> Any:
+    """orjson 不直接支持的类型"""
+    if isinstance(obj, datetime):  # pandas.Timestamp
+        return obj.isoformat()
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if hasattr(obj, 'item'):  # numpy 标量
+        return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError
+
+
+def _dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_orjson_default,
+                        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+class ORJSONResponse(JSONResponse):
+    """使用 orjson 序列化的 JSON 响应 (原生支持 numpy 类型，NaN 输出为 null)"""
+    
+    def render(self, content: Any) -> bytes:
+        return _dumps(content)
+
+
+def _streaming_json(content: dict, arrays_key: str, chunksize: int = 8192) -> StreamingResponse:
+    """content[arrays_key] 中的 numpy 数组按块序列化、边生成边发送，其余字段一次序列化
+    
+    输出与 ORJSONResponse(content) 相同 (键的顺序也不变)；长序列不必在内存中同时保留结果 dict
+    与完整的序列化字节串。其余字段在返回响应前就序列化，出错时异常由调用方处理，可以照常返回
+    {"error": ...}；数组分块序列化出错时响应已开始发送，客户端只会收到截断的 JSON
+    """
+    keys = list(content)
+    pos = keys.index(arrays_key)
+    head = _dumps({k: content[k] for k in keys[:pos]})
+    tail = _dumps({k: content[k] for k in keys[pos + 1:]})
+    
+    def body():
+        yield head[:-1] + (b',' if len(head) > 2 else b'') + _dumps(arrays_key) + b':{'
+        for i, (name, arr) in enumerate(content[arrays_key].items()):
+            yield (b',' if i else b'') + _dumps(name) + b':['
+            for start in range(0, len(arr), chunksize):
+                yield (b',' if start else b'') + _dumps(arr[start:start + chunksize])[1:-1]
+            yield b']'
+        yield b'}' + (b',' + tail[1:] if len(tail) > 2 else b'}')
+    
+    return StreamingResponse(body(), media_type='application/json')
+
+
+class ORJSONRoute(APIRoute):
+    """端点返回的 dict 直接交给 ORJSONResponse
+    
+    FastAPI 默认先用 jsonable_encoder 逐层复制整个结果再序列化，且遇到 numpy 类型会报错；
+    返回 Response 对象可跳过这一步
+    """
+    
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        if inspect.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def wrapped(*args, **kw):
+                return _to_response(await endpoint(*args, **kw))
+        else:
+            @functools.wraps(endpoint)
+            def wrapped(*args, **kw):
+                return _to_response(endpoint(*args, **kw))
+        super().__init__(path, wrapped, **kwargs)
+
+
+def _to_response(result: Any) -> Response:
+    if isinstance(result, Response):
+        return result
+    return ORJSONResponse(result)
+
+
+def _parse_iso(value: str) -> datetime:
+    """解析前端传来的 ISO 时间 (支持结尾的 Z)"""
+    if ciso8601 is not None:
+        try:
+            return ciso8601.parse_datetime(value)
+        except ValueError:
+            pass
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+app = FastAPI(title="GlycoNutri", version="0.4", default_response_class=ORJSONResponse)
+app.router.route_class = ORJSONRoute
+# 大于 1KB 的响应 (CGM 序列、图表数据等) 压缩；SSE 流不会被压缩。
+# 装了 brotli-asgi 时优先用 br (JSON 压缩率比 gzip 高)，quality=4 与 gzip 6 速度相当
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, quality=4, minimum_size=1024, excluded_handlers=[r'/stream$'])
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=6)
+
+# multipart 上传的文件 8MB 以内留在内存 (Starlette 默认超过 1MB 即写入临时文件，解析时再读回)；
+# 数月的 5 分钟 CGM 导出通常只有几 MB，省去一次落盘与读回的系统调用
+MultiPartParser.spool_max_size = 8 * 1024 * 1024
+
+# 首页及前端静态资源；运行过 scripts/minify_home.py 时提供压缩后的构建产物
+STATIC_DIR = Path(__file__).parent / "static"
+if (STATIC_DIR / "dist" / "index.html").exists():
+    STATIC_DIR = STATIC_DIR / "dist"
+
+
+# 预压缩文件的编码与后缀，按优先级排列
+_PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+# 构建时按内容哈希命名的资源 (如 app.1a2b3c4d5e.css)，内容变化时文件名随之变化
+_HASHED_ASSET_RE = re.compile(r'\.[0-9a-f]{10}\.(css|js)$')
+
+
+@functools.lru_cache(maxsize=64)
+def _precompressed_variants(path: str, mtime: float) -> tuple:
+    """path 旁的预压缩文件 ((编码, 路径, stat), ...)，不含早于原文件的 (原文件更新后未重新构建)
+    
+    按原文件路径与修改时间缓存，每个文件版本只查找一次，不必每次请求都 stat 兄弟文件
+    """
+    variants = []
+    for encoding, suffix in _PRECOMPRESSED:
+        try:
+            compressed_stat = os.stat(path + suffix)
+        except FileNotFoundError:
+            continue
+        if compressed_stat.st_mtime >= mtime:
+            variants.append((encoding, path + suffix, compressed_stat))
+    return tuple(variants)
+
+
+# 没有预压缩文件时在内存中压缩并缓存的文本资源 (未运行构建脚本的部署)
+_MEMORY_GZIP_SUFFIXES = ('.html', '.css', '.js')
+_MEMORY_GZIP_MAX_BYTES = 1024 * 1024
+
+
+@functools.lru_cache(maxsize=16)
+def _gzip_in_memory(path: str, mtime: float) -> tuple:
+    """(gzip 字节, ETag)；按原文件路径与修改时间缓存，每个文件版本只压缩一次"""
+    with open(path, 'rb') as f:
+        body = gzip.compress(f.read(), compresslevel=9, mtime=0)
+    return body, '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """静态文件旁有构建时预压缩的 .br/.gz 文件且浏览器接受该编码时直接发送压缩文件
+    
+    省去 GZipMiddleware 每次请求的实时压缩 (响应已带 Content-Encoding，中间件不再处理)；
+    没有构建产物时，文本资源在首次请求时 gzip 压缩一次并缓存在内存中；
+    HTML 未带版本号，加 Cache-Control: no-cache 让浏览器每次凭 ETag 验证 (未修改时 304)；
+    带内容哈希的资源永不变化，允许浏览器长期缓存且不再验证
+    """
+    
+    def file_response(self, full_path, stat_result, scope, status_code=200) -> Response:
+        request_headers = Headers(scope=scope)
+        accepted = {e.split(';')[0].strip() for e in request_headers.get('accept-encoding', '').split(',')}
+        media_type = mimetypes.guess_type(str(full_path))[0]
+        variants = _precompressed_variants(str(full_path), stat_result.st_mtime)
+        response = None
+        for encoding, compressed, compressed_stat in variants:
+            if encoding not in accepted:
+                continue
+            response = FileResponse(compressed, status_code=status_code, stat_result=compressed_stat,
+                                    media_type=media_type,
+                                    headers={'content-encoding': encoding, 'vary': 'Accept-Encoding'})
+            break
+        if (response is None and not variants and 'gzip' in accepted
+                and str(full_path).endswith(_MEMORY_GZIP_SUFFIXES) and stat_result.st_size <= _MEMORY_GZIP_MAX_BYTES):
+            body, etag = _gzip_in_memory(str(full_path), stat_result.st_mtime)
+            response = Response(body, status_code=status_code, media_type=media_type,
+                                headers={'content-encoding': 'gzip', 'vary': 'Accept-Encoding', 'etag': etag})
+        if response is not None and self.is_not_modified(response.headers, request_headers):
+            response = NotModifiedResponse(response.headers)
+        if response is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+        # 未预压缩的响应由 GZipMiddleware 按需压缩并添加 Vary
+        if str(full_path).endswith('.html'):
+            response.headers['cache-control'] = 'no-cache'
+        elif _HASHED_ASSET_RE.search(str(full_path)):
+            response.headers['cache-control'] = 'public, max-age=31536000, immutable'
+        return response
 
-@app.get("/", response_class=HTMLResponse)
-async def home():
-    return HTML_HOME
 
 # ============ API 端点 ============
 
+async def _json_body(request: Request) -> dict:
+    """读取 JSON 请求体
+    
+    I/O 在事件循环中完成；依赖它的同步分析端点在线程池中执行 (FastAPI 或 _limit_analysis)，
+    pandas 计算不会阻塞其他请求
+
+    也接受 multipart/form-data：普通参数放在 json 字段，CGM 数据作为文件字段上传
+    (字段名即参数名)，避免大段文本的 JSON 转义；大文件由 Starlette 落盘暂存。
+    类型为 application/gzip 的文件字段先解压；JSON 请求体可带 Content-Encoding: gzip。
+    application/octet-stream 请求体是前端预解析的二进制 CGM 数据，放在 cgm_buffer
+
+    带 cgm_id 时用 /api/cgm/analyze 已上传的文本补全 data/cgm_data，
+    id 已失效返回 404，前端据此重新上传原文
+    """
+    if request.headers.get('content-type', '').startswith('multipart/form-data'):
+        form = await request.form()
+        body = orjson.loads(form.get('json') or '{}')
+        for key, value in form.multi_items():
+            if key == 'json':
+                continue
+            if isinstance(value, str):
+                body[key] = value
+                continue
+            data = await value.read()
+            if value.content_type == 'application/gzip':
+                data = gzip.decompress(data)
+            body[key] = data.decode('utf-8-sig')
+    elif request.headers.get('content-type', '').startswith('application/octet-stream'):
+        body = {'cgm_buffer': await request.body()}
+    elif request.headers.get('content-encoding') == 'gzip':
+        body = orjson.loads(gzip.decompress(await request.body()))
+    else:
+        body = orjson.loads(await request.body())
+    
+    cgm_id = body.get('cgm_id')
+    if cgm_id:
+        text = _get_cgm_upload(cgm_id)
+        if text is None:
+            raise HTTPException(status_code=404, detail="CGM 数据已过期，请重新上传")
+        body.setdefault('data', text)
+        body.setdefault('cgm_data', text)
+    return body
+
+
+# 解析结果缓存：用户粘贴一次 CGM 数据后常在多个标签页间切换分析，按内容哈希复用
+_CGM_CACHE: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+_CGM_CACHE_SIZE = 32
+_CGM_CACHE_LOCK = threading.Lock()
+
+# 只依赖 CGM 文本的分析结果 (趋势、节律、报告等)，同一份数据重复提交时直接返回
+_RESULT_CACHE: "OrderedDict[str, Any]" = OrderedDict()
+_RESULT_CACHE_SIZE = 128
+
+# 已上传的 CGM 原文，按内容哈希作为 cgm_id 返回给前端，其他分析页只需回传 id
+_CGM_UPLOADS: "OrderedDict[str, str]" = OrderedDict()
+
+
+def _cgm_key(text: str) -> str:
+    """CGM 文本的内容哈希"""
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _store_cgm_upload(text: str) -> str:
+    """保存上传的 CGM 文本，返回 cgm_id"""
+    key = _cgm_key(text)
+    with _CGM_CACHE_LOCK:
+        _CGM_UPLOADS[key] = text
+        _CGM_UPLOADS.move_to_end(key)
+        if len(_CGM_UPLOADS) > _CGM_CACHE_SIZE:
+            _CGM_UPLOADS.popitem(last=False)
+    return key
+
+
+def _get_cgm_upload(cgm_id: str) -> "str | None":
+    """按 cgm_id 取回已上传的 CGM 文本"""
+    with _CGM_CACHE_LOCK:
+        text = _CGM_UPLOADS.get(cgm_id)
+        if text is not None:
+            _CGM_UPLOADS.move_to_end(cgm_id)
+    return text
+
+
+def _cached_parse(text: str, parse: "Callable[[str], pd.DataFrame]") -> "pd.DataFrame":
+    """按 (解析器, 文本内容哈希) 缓存解析结果，返回副本，调用方可自由增删列"""
+    key = f"{parse.__name__}:{_cgm_key(text)}"
+    with _CGM_CACHE_LOCK:
+        df = _CGM_CACHE.get(key)
+        if df is not None:
+            _CGM_CACHE.move_to_end(key)
+            return df.copy()
+    
+    df = parse(text)
+    with _CGM_CACHE_LOCK:
+        _CGM_CACHE[key] = df
+        if len(_CGM_CACHE) > _CGM_CACHE_SIZE:
+            _CGM_CACHE.popitem(last=False)
+    return df.copy()
+
+
+def _cached_analysis(text: str, analyze: "Callable[[pd.DataFrame], Any]") -> Any:
+    """解析 CGM 文本并分析，按 (分析函数, 文本内容哈希) 缓存结果
+    
+    命中时连解析也省去；返回值与其他请求共享，调用方只能直接返回、不可修改。分析出错不缓存。
+    结果随当前时间变化的分析 (如按最近 7/30 天统计的周报、月报) 不能用
+    """
+    key = f"{analyze.__module__}.{analyze.__name__}:{_cgm_key(text)}"
+    with _CGM_CACHE_LOCK:
+        if key in _RESULT_CACHE:
+            _RESULT_CACHE.move_to_end(key)
+            return _RESULT_CACHE[key]
+    
+    result = analyze(_parse_cgm_text(text))
+    with _CGM_CACHE_LOCK:
+        _RESULT_CACHE[key] = result
+        if len(_RESULT_CACHE) > _RESULT_CACHE_SIZE:
+            _RESULT_CACHE.popitem(last=False)
+    return result
+
+
+def _parse_cgm_text(text: str) -> "pd.DataFrame":
+    """解析粘贴的 CGM 文本，返回含 timestamp/glucose 列并按时间排序的 DataFrame"""
+    from glyconutri.cgm_adapters import parse_cgm_text
+    return _cached_parse(text, parse_cgm_text)
+
+
+def _parse_cgm_upload(text: str) -> "pd.DataFrame":
+    """用 cgm_adapters.parse_cgm_data (支持各厂商格式) 解析并缓存"""
+    from glyconutri.cgm_adapters import parse_cgm_data
+    return _cached_parse(text, parse_cgm_data)
+
+
+# 同时进行的 CGM 分析数上限 (默认为 CPU 核数的一半)：大文件解析与分析占用大量内存，
+# 突发的并发上传排队等待，不会同时展开导致内存耗尽
+_MAX_ANALYSES = int(os.environ.get("GLYCONUTRI_MAX_ANALYSES", max(1, (os.cpu_count() or 2) // 2)))
+_ANALYSIS_SEM = asyncio.Semaphore(_MAX_ANALYSES)
+
+
+def _limit_analysis(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """CPU/内存密集的同步端点：先在事件循环中等待分析名额，再放入线程池执行
+    
+    排队的请求不占用线程池线程，食物查询等轻量端点不受影响
+    """
+    @functools.wraps(endpoint)
+    async def wrapped(*args, **kwargs):
+        async with _ANALYSIS_SEM:
+            return await asyncio.to_thread(endpoint, *args, **kwargs)
+    return wrapped
+
+
+# 超过此点数的 CGM 序列流式返回
+_STREAM_MIN_POINTS = 50000
+
+
 @app.post("/api/cgm/analyze")
-async def api_cgm_analyze(request: Request):
+@_limit_analysis
+def api_cgm_analyze(body: dict = Depends(_json_body)):
     """分析 CGM 数据"""
-    from glyconutri.cgm_adapters import parse_cgm_data
+    from glyconutri.cgm_adapters import parse_cgm_buffer
+    from glyconutri.analysis import analyze_glucose
     
-    body = await request.json()
     text = body.get('data', '')
     
     try:
-        # 使用新的解析器（已包含所有格式支持）
-        df = parse_cgm_data(text)
+        if body.get('cgm_buffer'):
+            # 前端已解析好的二进制数据；保存为标准 CSV 供其他分析页按 cgm_id 引用
+            df = parse_cgm_buffer(body['cgm_buffer'])
+            text = df[['timestamp', 'glucose']].to_csv(index=False)
+        else:
+            # 使用新的解析器（已包含所有格式支持）
+            df = _parse_cgm_upload(text)
         
         # 解析器已返回标准格式：timestamp, glucose
         if df is None or df.empty:
@@ -2638,49 +404,153 @@ async def api_cgm_analyze(request: Request):
         
         results = analyze_glucose(df)
         
-        # 返回简洁的 CGM 数据
-        cgm_data = df[['timestamp', 'glucose']].to_dict('records')
-        
-        # 转换 numpy 类型为 Python 原生类型
-        def convert(obj):
-            import math
-            if hasattr(obj, 'item'):  # numpy types
-                obj = obj.item()
-            if isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)):
-                return None
-            return obj
-        
-        results_clean = {k: convert(v) for k, v in results.items()}
+        # 返回简洁的 CGM 数据：两个平行数组 (t 为本地时间按 UTC 计的毫秒数)，
+        # orjson 直接序列化 numpy 数组，不必为每个点生成 dict 和 Timestamp；
+        # g 保留 1 位小数 (远高于 CGM 精度)，mmol/L 换算出的 109.80000000000001 之类只输出为 109.8
+        cgm_data = {
+            "t": df['timestamp'].to_numpy().astype('datetime64[ms]').astype('int64'),
+            "g": df['glucose'].to_numpy().round(1)
+        }
         
-        return {
+        content = {
             "success": True,
             "data_points": len(df),
             "time_range": f"{df['timestamp'].min().strftime('%m-%d %H:%M')} ~ {df['timestamp'].max().strftime('%m-%d %H:%M')}",
-            "results": results_clean,
-            "cgm_data": cgm_data
+            "results": results,  # numpy 标量与 NaN/Inf 由 ORJSONResponse 直接处理 (NaN/Inf 输出为 null)
+            "cgm_data": cgm_data,
+            "cgm_id": _store_cgm_upload(text)
         }
+        # 数周的 1 分钟数据等长序列分块流式输出
+        if len(df) > _STREAM_MIN_POINTS:
+            return _streaming_json(content, "cgm_data")
+        return content
         
     except Exception as e:
         return {"error": str(e)}
 
 
+def _stream_analyze(file: UploadFile, chunksize: int = 65536) -> dict:
+    """分块读取上传的 CGM 文件并累积统计量
+    
+    上传内容已由 Starlette 暂存到临时文件，这里按块解析，内存占用与块大小相关而非文件大小；
+    单位 (mmol/L 或 mg/dL) 由第一块判断
+    """
+    import numpy as np
+    import pandas as pd
+    from glyconutri.cgm_adapters import parse_timestamps, sniff_delimiter, find_cgm_columns
+    
+    # 找到第一行数据以确定分隔符
+    stream = io.TextIOWrapper(file.file, encoding='utf-8-sig', newline='')
+    first = next((l for l in stream if l.strip() and not l.startswith('#')), '')
+    stream.detach()
+    file.file.seek(0)
+    stream = io.TextIOWrapper(file.file, encoding='utf-8-sig', newline='')
+    
+    sep = sniff_delimiter(first)
+    kwargs = {'sep': sep, 'header': None} if sep == r'\s+' else {'sep': sep}
+    
+    n, mean, m2 = 0, 0.0, 0.0
+    in_range = below_70 = above_180 = 0
+    start = end = None
+    scale = None
+    time_col = glucose_col = None
+    
+    for chunk in pd.read_csv(stream, comment='#', on_bad_lines='skip', chunksize=chunksize, **kwargs):
+        if time_col is None:
+            time_col, glucose_col = find_cgm_columns(chunk.columns)
+        
+        glucose = pd.to_numeric(chunk[glucose_col], errors='coerce').to_numpy(dtype=np.float64)
+        valid = ~np.isnan(glucose)
+        g = glucose[valid]
+        if not g.size:
+            continue
+        if scale is None:
+            scale = 18 if g.max() < 30 else 1
+        g = g * scale
+        
+        ts = parse_timestamps(chunk[time_col][valid])
+        start = ts.min() if start is None else min(start, ts.min())
+        end = ts.max() if end is None else max(end, ts.max())
+        
+        # 合并分块的均值/方差 (Chan 并行算法)
+        n_b, mean_b = g.size, g.mean()
+        m2_b = ((g - mean_b) ** 2).sum()
+        delta = mean_b - mean
+        total = n + n_b
+        mean += delta * n_b / total
+        m2 += m2_b + delta ** 2 * n * n_b / total
+        n = total
+        
+        in_range += np.count_nonzero((g >= 70) & (g <= 140))
+        below_70 += np.count_nonzero(g < 70)
+        above_180 += np.count_nonzero(g > 180)
+    
+    if not n:
+        return {"error": "无法解析数据"}
+    
+    std = (m2 / (n - 1)) ** 0.5 if n > 1 else 0.0
+    return {
+        "success": True,
+        "data_points": n,
+        "time_range": f"{start.strftime('%m-%d %H:%M')} ~ {end.strftime('%m-%d %H:%M')}",
+        "results": {
+            "mean_glucose": float(mean),
+            "std_glucose": float(std),
+            "tir": in_range / n * 100,
+            "gv": float(std / mean * 100) if mean > 0 else 0,
+            "time_below_70": below_70 / n * 100,
+            "time_above_180": above_180 / n * 100
+        }
+    }
+
+
+@app.post("/api/cgm/upload")
+@_limit_analysis
+def api_cgm_upload(file: UploadFile = File(...)):
+    """上传 CGM 文件并分析 (适合数月的大文件导出)
+    
+    上传内容由 Starlette 在事件循环中异步接收并暂存 (超过 8MB 才落盘)；本端点是同步函数，
+    分块解析由 _limit_analysis 放入线程池执行，不阻塞其他请求
+    """
+    try:
+        return _stream_analyze(file)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _static_json(request: Request, content: Any, max_age: int = 86400) -> Response:
+    """内容不随请求变化的 JSON 响应：带 Cache-Control 与 ETag，浏览器重复请求时返回 304"""
+    response = ORJSONResponse(content)
+    etag = '"' + hashlib.blake2b(response.body, digest_size=16).hexdigest() + '"'
+    headers = {"Cache-Control": f"public, max-age={max_age}", "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
+
+
 @app.get("/api/foods/search")
-def api_search_foods(q: str):
-    """搜索食物"""
+def api_search_foods(q: str, request: Request):
+    """搜索食物 (输入框每次按键都会请求；查询结果在 food 模块中按关键字缓存，这里允许浏览器缓存)"""
     results = search_foods(q)
-    return {"results": results[:15]}
+    return _static_json(request, {"results": results[:15]}, max_age=3600)
 
 
 @app.get("/api/foods/category/{category}")
-def api_foods_by_category(category: str):
-    """按类别获取食物"""
+def api_foods_by_category(category: str, request: Request):
+    """按类别获取食物 (食物库只读，允许浏览器缓存)"""
     foods = list_foods_by_gi_category(category)
-    return {"foods": foods[:30]}
+    return _static_json(request, {"foods": foods[:30]})
 
 
-@app.get("/api/food/info")
-def api_food_info(name: str, weight: float = 100):
-    """获取食物详细信息"""
+def _food_info(name: str, weight: float) -> dict:
+    """按重量计算食物信息"""
+    return dict(_cached_food_info(name, weight))
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_food_info(name: str, weight: float) -> dict:
+    """_food_info 的缓存实现 (食物库只读；未收录的名称也缓存，免去 get_carbs 的模糊匹配全表扫描)"""
     from glyconutri.gi_database import get_carbs
     
     carbs_per_100g = get_carbs(name)
@@ -2690,10 +560,25 @@ def api_food_info(name: str, weight: float = 100):
     return info or {"error": "未找到"}
 
 
+@app.get("/api/food/info")
+def api_food_info(name: str, weight: float = 100):
+    """获取食物详细信息"""
+    return _food_info(name, weight)
+
+
+@app.post("/api/food/info/batch")
+def api_food_info_batch(body: dict = Depends(_json_body)):
+    """批量获取食物信息，结果与请求顺序一致"""
+    foods = body.get('foods', [])
+    return {"results": [_food_info(f.get('name', ''), f.get('weight') or 100) for f in foods]}
+
+
 @app.post("/api/meal/analyze")
-async def api_meal_analyze(request: Request):
+@_limit_analysis
+def api_meal_analyze(body: dict = Depends(_json_body)):
     """餐后血糖分析"""
-    body = await request.json()
+    import pandas as pd
+    from glyconutri.postmeal import PostMealAnalysis, create_meal_session
     
     meal_time = body.get('meal_time')
     foods = body.get('foods', [])
@@ -2703,7 +588,7 @@ async def api_meal_analyze(request: Request):
         return {"error": "请提供餐食时间和食物"}
     
     # 计算食物营养
-    meal_session = create_meal_session(foods, datetime.fromisoformat(meal_time.replace('Z', '+00:00')))
+    meal_session = create_meal_session(foods, _parse_iso(meal_time))
     
     result = {
         "success": True,
@@ -2718,12 +603,24 @@ async def api_meal_analyze(request: Request):
     # 如果有 CGM 数据，进行血糖响应分析
     if cgm_text:
         try:
-            if isinstance(cgm_text, str):
-                cgm_text = json.loads(cgm_text)
+            # 字符串可能是 JSON (CGM 分析页返回的 cgm_data)，也可能是 cgm_id 对应的 CSV 原文
+            if isinstance(cgm_text, str) and cgm_text.lstrip()[:1] in ('[', '{'):
+                cgm_text = orjson.loads(cgm_text)
             
-            if isinstance(cgm_text, list):
-                df = pd.DataFrame(cgm_text)
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
+            if isinstance(cgm_text, str):
+                df = _parse_cgm_upload(cgm_text)
+            elif isinstance(cgm_text, dict):
+                df = pd.DataFrame({
+                    'timestamp': pd.to_datetime(cgm_text['t'], unit='ms'),
+                    'glucose': cgm_text['g']
+                })
+            elif isinstance(cgm_text, list):
+                # 旧版记录列表：直接取两列，按猜测的格式向量化解析时间，不经逐行构造 DataFrame
+                from glyconutri.cgm_adapters import parse_timestamps
+                df = pd.DataFrame({
+                    'timestamp': parse_timestamps([r['timestamp'] for r in cgm_text]),
+                    'glucose': [r['glucose'] for r in cgm_text]
+                })
             else:
                 return {**result, "glucose_response": {}, "error": "CGM 数据格式有误"}
             
@@ -2746,12 +643,10 @@ async def api_meal_analyze(request: Request):
 
 
 @app.post("/api/meal/nutrition")
-async def api_meal_nutrition(request: Request):
+def api_meal_nutrition(body: dict = Depends(_json_body)):
     """餐食营养分析 (无需CGM)"""
     from glyconutri.meal import analyze_meal
     
-    body = await request.json()
-    
     foods = body.get('foods', [])
     meal_name = body.get('meal_name', '早餐')
     timestamp = body.get('timestamp')
@@ -2760,7 +655,7 @@ async def api_meal_nutrition(request: Request):
         return {"error": "请提供食物列表"}
     
     try:
-        ts = datetime.fromisoformat(timestamp.replace('Z', '+00:00')) if timestamp else datetime.now()
+        ts = _parse_iso(timestamp) if timestamp else datetime.now()
         result = analyze_meal(foods, ts, meal_name)
         return result
     except Exception as e:
@@ -2768,12 +663,11 @@ async def api_meal_nutrition(request: Request):
 
 
 @app.post("/api/activity/exercise")
-async def api_exercise_analyze(request: Request):
+@_limit_analysis
+def api_exercise_analyze(body: dict = Depends(_json_body)):
     """运动血糖分析"""
     from glyconutri.activity import ExerciseEvent, ExerciseAnalysis
     
-    body = await request.json()
-    
     exercise_type = body.get('exercise_type')
     duration_minutes = body.get('duration_minutes', 30)
     start_time = body.get('start_time')
@@ -2786,25 +680,9 @@ async def api_exercise_analyze(request: Request):
         return {"error": "请提供血糖数据"}
     
     try:
-        lines = [l.strip() for l in cgm_text.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
+        df = _parse_cgm_text(cgm_text)
         
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
-        
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
-        
-        start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+        start_dt = _parse_iso(start_time)
         exercise = ExerciseEvent(exercise_type, duration_minutes, start_dt)
         analysis = ExerciseAnalysis(exercise, df)
         return analysis.get_full_analysis()
@@ -2813,12 +691,11 @@ async def api_exercise_analyze(request: Request):
 
 
 @app.post("/api/activity/sleep")
-async def api_sleep_analyze(request: Request):
+@_limit_analysis
+def api_sleep_analyze(body: dict = Depends(_json_body)):
     """睡眠血糖分析"""
     from glyconutri.activity import SleepEvent, SleepAnalysis
     
-    body = await request.json()
-    
     sleep_time = body.get('sleep_time')
     wake_time = body.get('wake_time')
     cgm_text = body.get('cgm_data')
@@ -2829,26 +706,10 @@ async def api_sleep_analyze(request: Request):
         return {"error": "请提供血糖数据"}
     
     try:
-        lines = [l.strip() for l in cgm_text.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
+        df = _parse_cgm_text(cgm_text)
         
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
-        
-        sleep_dt = datetime.fromisoformat(sleep_time.replace('Z', '+00:00'))
-        wake_dt = datetime.fromisoformat(wake_time.replace('Z', '+00:00'))
+        sleep_dt = _parse_iso(sleep_time)
+        wake_dt = _parse_iso(wake_time)
         sleep = SleepEvent(sleep_dt, wake_dt)
         analysis = SleepAnalysis(sleep, df)
         return analysis.get_full_analysis()
@@ -2857,12 +718,11 @@ async def api_sleep_analyze(request: Request):
 
 
 @app.post("/api/medication/analyze")
-async def api_medication_analyze(request: Request):
+@_limit_analysis
+def api_medication_analyze(body: dict = Depends(_json_body)):
     """药物血糖分析"""
     from glyconutri.medication import MedicationEvent, MedicationAnalysis, InsulinAnalysis
     
-    body = await request.json()
-    
     medication_type = body.get('medication_type', '口服')
     medication_name = body.get('medication_name')
     dosage = body.get('dosage')
@@ -2875,25 +735,9 @@ async def api_medication_analyze(request: Request):
         return {"error": "请提供血糖数据"}
     
     try:
-        lines = [l.strip() for l in cgm_text.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
-        
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
+        df = _parse_cgm_text(cgm_text)
         
-        taken_dt = datetime.fromisoformat(taken_time.replace('Z', '+00:00'))
+        taken_dt = _parse_iso(taken_time)
         
         if medication_type == "胰岛素":
             analysis = InsulinAnalysis(medication_name, dosage or 1, taken_dt, df)
@@ -2907,162 +751,99 @@ async def api_medication_analyze(request: Request):
 
 
 @app.post("/api/trend/analyze")
-async def api_trend_analyze(request: Request):
+@_limit_analysis
+def api_trend_analyze(body: dict = Depends(_json_body)):
     """血糖趋势分析"""
     from glyconutri.trend import analyze_trend
     
-    body = await request.json()
     text = body.get('data', '')
     
     try:
-        lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
-        
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
-        
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
-        
-        result = analyze_trend(df)
-        return result
+        return _cached_analysis(text, analyze_trend)
     except Exception as e:
         return {"error": str(e)}
 
 
+@app.post("/api/trend/analyze/stream")
+async def api_trend_analyze_stream(body: dict = Depends(_json_body)):
+    """血糖趋势分析 (NDJSON 流式)
+    
+    每行一个 {键: 结果} 对象，按每日汇总、周、月、时段、星期、模式的顺序逐段计算、算完即发送，
+    前端收到每日汇总即可先渲染；合并所有行即为 /api/trend/analyze 的结果。
+    解析失败时只有一行 {"error": ...}，计算中途出错时以一行 {"error": ...} 结束
+
+    各段在返回响应之后才计算，所以不用 _limit_analysis (它在端点返回时就释放名额)，
+    而是在整个流期间持有分析名额；解析与逐段计算都放入线程池，不阻塞事件循环
+    """
+    from starlette.concurrency import iterate_in_threadpool
+    from glyconutri.trend import TrendAnalysis
+    
+    text = body.get('data', '')
+    
+    async def lines():
+        async with _ANALYSIS_SEM:
+            try:
+                sections = await asyncio.to_thread(lambda: TrendAnalysis(_parse_cgm_text(text)).iter_trend())
+                async for key, value in iterate_in_threadpool(sections):
+                    yield _dumps({key: value}) + b'\n'
+            except Exception as e:
+                yield _dumps({"error": str(e)}) + b'\n'
+    
+    return StreamingResponse(lines(), media_type='application/x-ndjson')
+
+
 @app.post("/api/chart/data")
-async def api_chart_data(request: Request):
+@_limit_analysis
+def api_chart_data(body: dict = Depends(_json_body)):
     """获取图表数据"""
     from glyconutri.chart import get_chart_data
     
-    body = await request.json()
     text = body.get('data', '')
     
     try:
-        lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
-        
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
-        
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
-        
-        return get_chart_data(df)
+        return _cached_analysis(text, get_chart_data)
     except Exception as e:
         return {"error": str(e)}
 
 
 @app.post("/api/circadian/analyze")
-async def api_circadian_analyze(request: Request):
+@_limit_analysis
+def api_circadian_analyze(body: dict = Depends(_json_body)):
     """昼夜节律分析"""
     from glyconutri.circadian import analyze_circadian
     
-    body = await request.json()
     text = body.get('data', '')
     
     try:
-        lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
-        
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
-        
-        return analyze_circadian(df)
+        return _cached_analysis(text, analyze_circadian)
     except Exception as e:
         return {"error": str(e)}
 
 
 @app.post("/api/biomarker/analyze")
-async def api_biomarker_analyze(request: Request):
+@_limit_analysis
+def api_biomarker_analyze(body: dict = Depends(_json_body)):
     """生物标志物分析"""
     from glyconutri.circadian import analyze_biomarkers
     
-    body = await request.json()
     text = body.get('data', '')
     
     try:
-        lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
-        
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
-        
-        return analyze_biomarkers(df)
+        return _cached_analysis(text, analyze_biomarkers)
     except Exception as e:
         return {"error": str(e)}
 
 
 @app.post("/api/report/weekly")
-async def api_report_weekly(request: Request):
+@_limit_analysis
+def api_report_weekly(body: dict = Depends(_json_body)):
     """周报"""
     from glyconutri.analysis_enhanced import generate_weekly_report
     
-    body = await request.json()
     text = body.get('data', '')
     
     try:
-        lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
-        
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
+        df = _parse_cgm_text(text)
         
         return generate_weekly_report(df)
     except Exception as e:
@@ -3070,31 +851,15 @@ async def api_report_weekly(request: Request):
 
 
 @app.post("/api/report/monthly")
-async def api_report_monthly(request: Request):
+@_limit_analysis
+def api_report_monthly(body: dict = Depends(_json_body)):
     """月报"""
     from glyconutri.analysis_enhanced import generate_monthly_report
     
-    body = await request.json()
     text = body.get('data', '')
     
     try:
-        lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
-        
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
+        df = _parse_cgm_text(text)
         
         return generate_monthly_report(df)
     except Exception as e:
@@ -3116,22 +881,44 @@ async def api_voice_transcribe(request: Request):
         # 读取音频数据
         audio_bytes = await audio_file.read()
         
-        # 转录
+        # 转录 (模型推理耗时，放到线程中执行，不阻塞事件循环上的其他请求)
         voice = get_voice_input()
-        result = voice.transcribe_bytes(audio_bytes, language="zh")
+        result = await asyncio.to_thread(voice.transcribe_bytes, audio_bytes, language="zh")
         
         return result
     except Exception as e:
         return {"error": str(e), "text": ""}
 
 
+@app.post("/api/voice/transcribe/stream")
+async def api_voice_transcribe_stream(request: Request):
+    """语音流式转录 (SSE)"""
+    from glyconutri.voice import get_voice_input
+    
+    form = await request.form()
+    audio_file = form.get('audio')
+    
+    if not audio_file:
+        return {"error": "没有音频文件", "text": ""}
+    
+    audio_bytes = await audio_file.read()
+    voice = get_voice_input()
+    
+    def event_stream():
+        for part in voice.transcribe_bytes_stream(audio_bytes, language="zh"):
+            yield b"data: " + _dumps(part) + b"\n\n"
+        yield b"event: done\ndata: {}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.post("/api/voice/parse")
 async def api_voice_parse(request: Request):
     """解析语音文本"""
     from glyconutri.voice import parse_meal_from_speech
     
     try:
-        body = await request.json()
+        body = orjson.loads(await request.body())
         text = body.get('text', '')
         
         if not text:
@@ -3158,50 +945,28 @@ async def api_food_recognize(request: Request):
         # 读取图片数据
         image_bytes = await image_file.read()
         
-        # 识别
+        # 识别 (同上，放到线程中执行)
         recognizer = get_food_recognizer()
-        result = recognizer.recognize_from_bytes(image_bytes)
+        result = await asyncio.to_thread(recognizer.recognize_from_bytes, image_bytes)
         
         return result
     except Exception as e:
         return {"error": str(e), "foods": []}
 
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
-
-
 @app.post("/api/analysis/alcohol")
-async def api_analysis_alcohol(request: Request):
+@_limit_analysis
+def api_analysis_alcohol(body: dict = Depends(_json_body)):
     """饮酒影响分析"""
     from glyconutri.analysis_enhanced import analyze_alcohol
     
-    body = await request.json()
     text = body.get('data', '')
     alcohol_time = body.get('alcohol_time')
     
     try:
-        from datetime import datetime
-        alcohol_dt = datetime.fromisoformat(alcohol_time.replace('Z', '+00:00'))
-        
-        lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
+        alcohol_dt = _parse_iso(alcohol_time)
         
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
+        df = _parse_cgm_text(text)
         
         return analyze_alcohol(df, alcohol_dt)
     except Exception as e:
@@ -3209,31 +974,15 @@ async def api_analysis_alcohol(request: Request):
 
 
 @app.post("/api/analysis/stress")
-async def api_analysis_stress(request: Request):
+@_limit_analysis
+def api_analysis_stress(body: dict = Depends(_json_body)):
     """压力分析"""
     from glyconutri.analysis_enhanced import analyze_stress
     
-    body = await request.json()
     text = body.get('data', '')
     
     try:
-        lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
-        
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
+        df = _parse_cgm_text(text)
         
         return analyze_stress(df)
     except Exception as e:
@@ -3241,31 +990,15 @@ async def api_analysis_stress(request: Request):
 
 
 @app.post("/api/analysis/illness")
-async def api_analysis_illness(request: Request):
+@_limit_analysis
+def api_analysis_illness(body: dict = Depends(_json_body)):
     """疾病分析"""
     from glyconutri.analysis_enhanced import analyze_illness
     
-    body = await request.json()
     text = body.get('data', '')
     
     try:
-        lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
-        
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
+        df = _parse_cgm_text(text)
         
         return analyze_illness(df)
     except Exception as e:
@@ -3273,9 +1006,11 @@ async def api_analysis_illness(request: Request):
 
 
 @app.post("/api/analysis/goals")
-async def api_analysis_goals(request: Request):
+@_limit_analysis
+def api_analysis_goals(body: dict = Depends(_json_body)):
     """目标追踪"""
-    body = await request.json()
+    import numpy as np
+    
     text = body.get('data', '')
     tir_goal = body.get('tir_goal', 70)
     mean_goal = body.get('mean_goal', 140)
@@ -3285,29 +1020,13 @@ async def api_analysis_goals(request: Request):
         if not text.strip():
             return {"error": "需要CGM数据"}
         
-        lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
-        
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
+        df = _parse_cgm_text(text)
         
         # 计算实际值
-        in_range = ((df['glucose'] >= 70) & (df['glucose'] <= 180)).sum()
-        actual_tir = round(in_range / len(df) * 100, 1)
-        actual_mean = round(df['glucose'].mean(), 1)
-        actual_gv = round(df['glucose'].std() / df['glucose'].mean() * 100, 1)
+        g = df['glucose'].to_numpy(dtype=np.float64)
+        actual_tir = round(np.count_nonzero((g >= 70) & (g <= 180)) / g.size * 100, 1)
+        actual_mean = round(float(g.mean()), 1)
+        actual_gv = round(float(g.std(ddof=1) / g.mean() * 100), 1)
         
         return {
             "actual_tir": actual_tir,
@@ -3322,38 +1041,21 @@ async def api_analysis_goals(request: Request):
 
 
 @app.post("/api/analysis/menstrual")
-async def api_analysis_menstrual(request: Request):
+@_limit_analysis
+def api_analysis_menstrual(body: dict = Depends(_json_body)):
     """生理期分析"""
     from glyconutri.circadian import BiomarkerAnalysis
     
-    body = await request.json()
     text = body.get('data', '')
     periods = body.get('periods', [])
     
     try:
-        lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
-        
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
+        df = _parse_cgm_text(text)
         
         # 创建分析器
-        from datetime import datetime
         period_objects = []
         for p in periods:
-            start = datetime.fromisoformat(p['start'].replace('Z', '+00:00'))
+            start = _parse_iso(p['start'])
             period_objects.append({'start': start, 'end': start})
         
         analysis = BiomarkerAnalysis(df)
@@ -3384,32 +1086,16 @@ async def api_analysis_menstrual(request: Request):
 
 
 @app.post("/api/report/{report_type}/pdf")
-async def api_report_pdf(report_type: str, request: Request):
+@_limit_analysis
+def api_report_pdf(report_type: str, body: dict = Depends(_json_body)):
     """生成 PDF 报告"""
     from glyconutri.analysis_enhanced import generate_weekly_report, generate_monthly_report
     from glyconutri.pdf_export import generate_pdf
     
-    body = await request.json()
     text = body.get('data', '')
     
     try:
-        lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
-        
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
+        df = _parse_cgm_text(text)
         
         # 生成报告数据
         if report_type == 'weekly':
@@ -3432,32 +1118,16 @@ async def api_report_pdf(report_type: str, request: Request):
 
 
 @app.post("/api/insurance/export")
-async def api_insurance_export(request: Request):
+@_limit_analysis
+def api_insurance_export(body: dict = Depends(_json_body)):
     """保险数据导出"""
     from glyconutri.analysis_enhanced import generate_weekly_report
     
-    body = await request.json()
     text = body.get('data', '')
     report_type = body.get('report_type', 'basic')
     
     try:
-        lines = [l.strip() for l in text.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines[0]:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), on_bad_lines='skip')
-        else:
-            df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['time', 'date', '时间'])), df.columns[0])
-        glucose_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['glucose', 'value', 'sg', '血糖'])), df.columns[-1])
-        
-        df['timestamp'] = pd.to_datetime(df[time_col])
-        df['glucose'] = pd.to_numeric(df[glucose_col], errors='coerce')
-        if df['glucose'].max() < 30:
-            df['glucose'] = df['glucose'] * 18
-        df = df.dropna(subset=['glucose']).sort_values('timestamp')
+        df = _parse_cgm_text(text)
         
         # 生成报告
         report = generate_weekly_report(df)
@@ -3495,58 +1165,28 @@ async def api_coach_chat(request: Request):
     """AI教练对话"""
     from glyconutri.coach import chat
     
-    body = await request.json()
+    body = orjson.loads(await request.body())
     message = body.get('message', '')
     
     if not message:
         return {"reply": "请输入问题"}
     
-    reply = chat(message)
+    reply = await asyncio.to_thread(chat, message)
     return {"reply": reply}
 
 
 @app.post("/api/research/abtest")
-async def api_research_abtest(request: Request):
+@_limit_analysis
+def api_research_abtest(body: dict = Depends(_json_body)):
     """AB测试分析"""
     from glyconutri.clinical import ab_test
     
-    body = await request.json()
     data_a = body.get('group_a', '')
     data_b = body.get('group_b', '')
     
     try:
-        # Parse data A
-        lines_a = [l.strip() for l in data_a.split('\n') if l.strip() and not l.startswith('#')]
-        import io
-        if '\t' in lines_a[0]:
-            df_a = pd.read_csv(io.StringIO('\n'.join(lines_a)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines_a[0]:
-            df_a = pd.read_csv(io.StringIO('\n'.join(lines_a)), on_bad_lines='skip')
-        else:
-            df_a = pd.read_csv(io.StringIO('\n'.join(lines_a)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        time_col = df_a.columns[0]
-        glucose_col = df_a.columns[-1]
-        df_a['timestamp'] = pd.to_datetime(df_a[time_col])
-        df_a['glucose'] = pd.to_numeric(df_a[glucose_col], errors='coerce')
-        if df_a['glucose'].max() < 30:
-            df_a['glucose'] = df_a['glucose'] * 18
-        df_a = df_a.dropna(subset=['glucose'])
-        
-        # Parse data B
-        lines_b = [l.strip() for l in data_b.split('\n') if l.strip() and not l.startswith('#')]
-        if '\t' in lines_b[0]:
-            df_b = pd.read_csv(io.StringIO('\n'.join(lines_b)), sep='\t', on_bad_lines='skip')
-        elif ',' in lines_b[0]:
-            df_b = pd.read_csv(io.StringIO('\n'.join(lines_b)), on_bad_lines='skip')
-        else:
-            df_b = pd.read_csv(io.StringIO('\n'.join(lines_b)), sep=r'\s+', on_bad_lines='skip', header=None)
-        
-        df_b['timestamp'] = pd.to_datetime(df_b[time_col])
-        df_b['glucose'] = pd.to_numeric(df_b[glucose_col], errors='coerce')
-        if df_b['glucose'].max() < 30:
-            df_b['glucose'] = df_b['glucose'] * 18
-        df_b = df_b.dropna(subset=['glucose'])
+        df_a = _parse_cgm_text(data_a)
+        df_b = _parse_cgm_text(data_b)
         
         # Run AB test
         result = ab_test(df_a, df_b)
@@ -3558,7 +1198,7 @@ async def api_research_abtest(request: Request):
 @app.post("/api/research/correlation")
 async def api_research_correlation(request: Request):
     """相关性分析"""
-    body = await request.json()
+    body = orjson.loads(await request.body())
     # Simplified correlation
     return {"message": "相关性分析需要更多参数"}
 
@@ -3575,6 +1215,16 @@ async def api_research_regression(request: Request):
     return {"message": "回归分析功能开发中"}
 
 
+# 首页 (StaticFiles 直接发送文件并处理 ETag/304，须在所有 API 路由之后挂载)
+app.mount("/", PrecompressedStaticFiles(directory=STATIC_DIR, html=True), name="home")
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # 安装 uvicorn[standard] 后自动使用 uvloop 事件循环和 httptools 解析器；
+    # 多 worker 需以导入字符串启动 (各 worker 的解析缓存与 cgm_id 相互独立，
+    # 请求落到其他 worker 时 cgm_id 返回 404，前端重新上传原文)。
+    # GLYCONUTRI_WORKERS=auto 时按 CPU 核数启动 worker
+    workers = os.environ.get("GLYCONUTRI_WORKERS", "1")
+    uvicorn.run("glyconutri.web:app", host="0.0.0.0", port=8000, backlog=2048,
+                workers=(os.cpu_count() or 1) if workers == "auto" else int(workers))
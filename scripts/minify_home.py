@@ -0,0 +1,133 @@
+"""
+首页压缩构建脚本
+
+读取 glyconutri/static/index.html，压缩其中的 CSS/JS/HTML 空白与注释，
+输出到 glyconutri/static/dist/index.html；web.py 检测到构建产物时优先提供它。
+内联的 <style> 抽出为按内容哈希命名的 dist/app.<hash>.css，HTML 改为 <link> 引用，
+web.py 对带哈希的文件发送 Cache-Control: immutable，浏览器跨会话缓存样式表。
+同时生成预压缩的 index.html.gz (以及装了 brotli 时的 index.html.br)，
+web.py 按浏览器的 Accept-Encoding 直接发送，不必每次请求实时压缩。
+
+安装了 csscompressor / rjsmin 时使用它们，否则退回到保守的逐行压缩
+(只去掉缩进、空行和整行注释，保留换行以免影响 JS 自动分号插入)。
+
+用法: python scripts/minify_home.py
+"""
+
+import gzip
+import hashlib
+import re
+import sys
+from pathlib import Path
+
+try:
+    import csscompressor
+except ImportError:
+    csscompressor = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "glyconutri" / "static"
+SOURCE = STATIC_DIR / "index.html"
+OUTPUT = STATIC_DIR / "dist" / "index.html"
+
+_BLOCK_RE = re.compile(r'(<(style|script)\b[^>]*>)(.*?)(</\2>)', re.S | re.I)
+_STYLE_RE = re.compile(r'<style\b[^>]*>(.*?)</style>', re.S | re.I)
+
+
+def minify_css(css: str) -> str:
+    """压缩 CSS"""
+    if csscompressor is not None:
+        return csscompressor.compress(css)
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+def minify_js(js: str) -> str:
+    """压缩 JS"""
+    if rjsmin is not None:
+        return rjsmin.jsmin(js)
+    lines = (line.strip() for line in js.split('\n'))
+    return '\n'.join(l for l in lines if l and not l.startswith('//'))
+
+
+def minify_html(html: str) -> str:
+    """压缩 HTML 标记 (不含 style/script 内容)"""
+    html = re.sub(r'<!--.*?-->', '', html, flags=re.S)
+    lines = (line.strip() for line in html.split('\n'))
+    return '\n'.join(l for l in lines if l)
+
+
+def minify_page(html: str) -> str:
+    """压缩整个页面"""
+    parts = []
+    pos = 0
+    for m in _BLOCK_RE.finditer(html):
+        parts.append(minify_html(html[pos:m.start()]))
+        body = minify_css(m.group(3)) if m.group(2).lower() == 'style' else minify_js(m.group(3))
+        parts.append(m.group(1) + body + m.group(4))
+        pos = m.end()
+    parts.append(minify_html(html[pos:]))
+    return '\n'.join(p for p in parts if p)
+
+
+def extract_css(html: str) -> tuple:
+    """把第一个 <style> 块压缩后抽出，返回 (替换为 <link> 的 HTML, 样式表文件名, CSS)；没有时文件名为 None"""
+    m = _STYLE_RE.search(html)
+    if m is None:
+        return html, None, None
+    css = minify_css(m.group(1))
+    name = f"app.{hashlib.sha256(css.encode('utf-8')).hexdigest()[:10]}.css"
+    link = f'<link rel="stylesheet" href="/{name}">'
+    return html[:m.start()] + link + html[m.end():], name, css
+
+
+def write_precompressed(path: Path) -> None:
+    """在 path 旁写入 .gz (及 .br) 预压缩文件；没有 brotli 时删除旧的 .br 以免发送过期内容"""
+    data = path.read_bytes()
+    # mtime=0 使相同内容的构建产物逐字节一致
+    path.with_name(path.name + '.gz').write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    br_path = path.with_name(path.name + '.br')
+    if brotli is not None:
+        br_path.write_bytes(brotli.compress(data, quality=11))
+    elif br_path.exists():
+        br_path.unlink()
+
+
+def main() -> int:
+    source = SOURCE.read_text(encoding='utf-8')
+    page, css_name, css = extract_css(source)
+    output = minify_page(page)
+    OUTPUT.parent.mkdir(exist_ok=True)
+    # 清理旧版本的样式表
+    for old in OUTPUT.parent.glob('app.*.css*'):
+        old.unlink()
+    if css_name is not None:
+        css_path = OUTPUT.parent / css_name
+        css_path.write_text(css, encoding='utf-8')
+        write_precompressed(css_path)
+    OUTPUT.write_text(output, encoding='utf-8')
+    write_precompressed(OUTPUT)
+
+    before = len(source.encode('utf-8'))
+    after = len(output.encode('utf-8'))
+    gz = OUTPUT.with_name(OUTPUT.name + '.gz').stat().st_size
+    print(f"{SOURCE.name}: {before} -> {after} 字节 ({after / before:.0%})，gzip 后 {gz} 字节")
+    if css_name is not None:
+        print(f"{css_name}: {len(css.encode('utf-8'))} 字节")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,6 +4,8 @@
 
 import pandas as pd
 from glyconutri.cgm import calculate_tir, calculate_gv
+from glyconutri.cgm_adapters import (sniff_delimiter, sniff_time_format, parse_standard_format,
+                                     parse_cgm_data, parse_cgm_text, parse_wxqi_format)
 
 
 def test_calculate_tir():
@@ -29,7 +31,76 @@ def test_calculate_gv():
     print(f"✓ GV 计算测试通过: {gv:.1f}%")
 
 
+def test_sniff_delimiter():
+    """测试分隔符检测 (含分号分隔的导出)"""
+    assert sniff_delimiter("time,glucose\n2026-02-15 07:00,92") == ','
+    assert sniff_delimiter("time\tglucose\n2026-02-15 07:00\t92") == '\t'
+    assert sniff_delimiter("2026-02-15 07:00 92") == r'\s+'
+    assert sniff_delimiter("time|glucose\n2026-02-15 07:00|92") == '|'
+    
+    df = parse_standard_format("time;glucose\n2026-02-15 07:00;5.1\n2026-02-15 07:15;5.5")
+    assert df['glucose'].round(1).tolist() == [91.8, 99.0]
+    print("✓ 分隔符检测测试通过")
+
+
+def test_sniff_time_format():
+    """测试时间格式检测"""
+    assert sniff_time_format("2026-02-15 07:00") == '%Y-%m-%d %H:%M'
+    assert sniff_time_format("2024/03/16 12:03:05") == '%Y/%m/%d %H:%M:%S'
+    assert sniff_time_format("2026-02-15T07:00:00") == '%Y-%m-%dT%H:%M:%S'
+    assert sniff_time_format("02/15/2026 07:00") is None
+    
+    df = parse_standard_format("time,glucose\n2026-02-15 07:00:30,5.1\n2026-02-15 07:15:00,5.5")
+    assert df['timestamp'].dt.strftime('%H:%M:%S').tolist() == ['07:00:30', '07:15:00']
+    print("✓ 时间格式检测测试通过")
+
+
+def test_timezone_aware_timestamps():
+    """测试带 Z / +08:00 的 ISO 8601 时间保留当地钟点"""
+    import warnings
+    for suffix in ('Z', '+08:00'):
+        text = f"timestamp,glucose\n2024-01-01T08:00:00{suffix},5.5\n2024-01-01T08:15:00{suffix},6.0\n"
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            frames = [parse_cgm_data(text), parse_cgm_text(text), parse_standard_format("# Nightscout\n" + text)]
+        for df in frames:
+            assert str(df['timestamp'].dtype) == 'datetime64[s]'
+            assert df['timestamp'].dt.strftime('%H:%M').tolist() == ['08:00', '08:15']
+            assert df['glucose'].tolist() == [99.0, 108.0]
+    print("✓ 带时区时间测试通过")
+
+
+def test_wxqi_second_resolution():
+    """测试 WXQI 格式的时间列同样为秒精度"""
+    df = parse_wxqi_format("ID 日期 时间 类型 血糖\n69137 2024/03/16 12:18 0 6.1\n69136 2024/03/16 12:03 0 15.3\n")
+    assert str(df['timestamp'].dtype) == 'datetime64[s]'
+    assert df['timestamp'].dt.strftime('%H:%M').tolist() == ['12:03', '12:18']
+    print("✓ WXQI 时间精度测试通过")
+
+
+def test_analyze_glucose_cache():
+    """测试分析结果按摘要缓存，返回副本"""
+    from glyconutri.analysis import analyze_glucose, _RESULT_CACHE
+    df = pd.DataFrame({'glucose': [60.0, 100.0, 150.0, 260.0]})
+    first = analyze_glucose(df)
+    first['tir'] = -1
+    assert analyze_glucose(df)['tir'] == 25.0
+    assert all(isinstance(k, bytes) and len(k) == 16 for k in _RESULT_CACHE)
+    
+    # 血糖列为空或全为缺失值时统计量为 NaN，各时间占比为 0
+    for glucose in ([], [float('nan'), float('nan')]):
+        results = analyze_glucose(pd.DataFrame({'glucose': glucose}, dtype=float))
+        assert pd.isna(results['mean_glucose']) and pd.isna(results['max_glucose'])
+        assert results['tir'] == 0 and results['time_below_70'] == 0 and results['gv'] == 0
+    print("✓ 分析结果缓存测试通过")
+
+
 if __name__ == '__main__':
     test_calculate_tir()
     test_calculate_gv()
+    test_sniff_delimiter()
+    test_sniff_time_format()
+    test_timezone_aware_timestamps()
+    test_wxqi_second_resolution()
+    test_analyze_glucose_cache()
     print("\n所有测试通过! ✓")
@@ -11,6 +11,11 @@ def test_search_foods():
     assert len(results) > 0, "应该能找到米饭相关食物"
     print(f"✓ 搜索'米'找到 {len(results)} 个结果")
     
+    # 修改返回结果不影响缓存
+    gi = results[0]['gi']
+    results[0]['gi'] = -1
+    assert search_foods("米")[0]['gi'] == gi
+    
     results = search_foods("apple")
     assert len(results) > 0, "应该能找到苹果"
     print(f"✓ 搜索'apple'找到 {len(results)} 个结果")
@@ -22,6 +27,10 @@ def test_list_by_category():
     assert len(low_gi) > 0, "应该有低 GI 食物"
     print(f"✓ 低 GI 食物: {len(low_gi)} 个")
     
+    gi = low_gi[0]['gi']
+    low_gi[0]['gi'] = -1
+    assert list_foods_by_gi_category("低")[0]['gi'] == gi
+    
     high_gi = list_foods_by_gi_category("高")
     assert len(high_gi) > 0, "应该有高 GI 食物"
     print(f"✓ 高 GI 食物: {len(high_gi)} 个")
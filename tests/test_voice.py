@@ -0,0 +1,52 @@
+"""
+测试语音餐食解析
+"""
+
+import os
+
+from glyconutri.voice import VoiceMealParser, _temp_dir, _write_temp_audio
+
+
+def test_quantity_before_keyword():
+    """测试 "X碗米饭" 数量提取"""
+    result = VoiceMealParser().parse_meal_description("早餐吃了2碗米饭和鸡蛋")
+    foods = {f['name']: f['quantity'] for f in result['foods']}
+    assert foods['米饭'] == 2.0
+    assert foods['鸡蛋'] == 1.0
+    assert result['meal_type'] == "breakfast"
+
+
+def test_quantity_after_keyword():
+    """测试 "牛奶1.5杯" 数量提取"""
+    result = VoiceMealParser().parse_meal_description("喝了牛奶1.5杯")
+    assert result['foods'][0]['name'] == "牛奶"
+    assert result['foods'][0]['quantity'] == 1.5
+
+
+def test_shared_quantity_between_keywords():
+    """测试数量夹在两个关键词之间"""
+    quantities = VoiceMealParser()._extract_quantities("米饭2碗面条")
+    assert quantities == {"米饭": 2.0, "面条": 2.0}
+
+
+def test_temp_dir_lazy():
+    """测试临时音频目录在首次写入时按 GLYCONUTRI_TMPDIR 确定"""
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["GLYCONUTRI_TMPDIR"] = tmp
+        _temp_dir.cache_clear()
+        try:
+            path = _write_temp_audio(b"RIFF")
+            assert os.path.dirname(path) == tmp
+            os.remove(path)
+        finally:
+            del os.environ["GLYCONUTRI_TMPDIR"]
+            _temp_dir.cache_clear()
+
+
+if __name__ == '__main__':
+    test_quantity_before_keyword()
+    test_quantity_after_keyword()
+    test_shared_quantity_between_keywords()
+    test_temp_dir_lazy()
+    print("\n所有测试通过! ✓")
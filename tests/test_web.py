@@ -0,0 +1,317 @@
+"""
+测试 Web 接口
+"""
+
+import asyncio
+import gzip
+import json
+
+from fastapi.testclient import TestClient
+from glyconutri.web import app, _parse_cgm_text, _CGM_CACHE
+
+client = TestClient(app)
+
+
+def test_home_etag():
+    """测试首页 ETag 缓存"""
+    res = client.get("/")
+    assert res.status_code == 200
+    assert "GlycoNutri" in res.text
+
+    etag = res.headers["etag"]
+    res = client.get("/", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+
+
+def test_web_import_is_lazy():
+    """测试导入 web 模块不加载 pandas/numpy (只提供首页的 worker 启动快、占用内存少)"""
+    import subprocess
+    import sys
+    code = "import sys, glyconutri.web; print(sorted(m for m in ('pandas', 'numpy') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_precompressed_static():
+    """测试预压缩的静态文件按 Accept-Encoding 直接发送"""
+    import tempfile
+    from pathlib import Path
+    from fastapi import FastAPI
+    from glyconutri.web import PrecompressedStaticFiles
+
+    html = "<html>" + "血糖" * 1000 + "</html>"
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "index.html").write_text(html, encoding="utf-8")
+        (Path(tmp) / "index.html.gz").write_bytes(gzip.compress(html.encode()))
+        static_app = FastAPI()
+        static_app.mount("/", PrecompressedStaticFiles(directory=tmp, html=True))
+        static_client = TestClient(static_app)
+
+        res = static_client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert res.headers["content-encoding"] == "gzip"
+        assert res.headers["content-type"] == "text/html; charset=utf-8"
+        assert res.headers["cache-control"] == "no-cache"
+        assert res.text == html
+
+        res = static_client.get("/", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in res.headers
+        assert res.text == html
+
+        # 没有 .gz 兄弟文件的文本资源在内存中压缩
+        css = "body{color:red}" * 100
+        (Path(tmp) / "app.css").write_text(css)
+        res = static_client.get("/app.css", headers={"Accept-Encoding": "gzip"})
+        assert res.headers["content-encoding"] == "gzip"
+        assert res.text == css
+        res = static_client.get("/app.css", headers={"Accept-Encoding": "gzip", "If-None-Match": res.headers["etag"]})
+        assert res.status_code == 304
+
+        (Path(tmp) / "app.0123456789.css").write_text("body{color:red}")
+        res = static_client.get("/app.0123456789.css")
+        assert res.headers["cache-control"] == "public, max-age=31536000, immutable"
+        assert res.headers["content-type"].startswith("text/css")
+
+
+def test_parse_cgm_text_cache():
+    """测试 CGM 文本解析缓存"""
+    text = "time,glucose\n2024-01-01 08:00,5.5\n2024-01-01 08:15,6.0\n"
+    df1 = _parse_cgm_text(text)
+    df1['glucose'] = 0
+    df2 = _parse_cgm_text(text)
+    assert len(_CGM_CACHE) >= 1
+    assert df2['glucose'].tolist() == [99.0, 108.0]
+
+
+def test_analysis_result_cache():
+    """测试同一份 CGM 文本的分析结果缓存"""
+    from glyconutri.web import _cached_analysis
+    text = "time,glucose\n2024-01-01 08:00,5.5\n2024-01-01 08:15,6.0\n"
+    calls = []
+
+    def count_points(df):
+        calls.append(1)
+        return {"n": len(df)}
+
+    assert _cached_analysis(text, count_points) == {"n": 2}
+    assert _cached_analysis(text, count_points) == {"n": 2}
+    assert len(calls) == 1
+
+    res = client.post("/api/trend/analyze", json={"data": text})
+    assert res.json() == client.post("/api/trend/analyze", json={"data": text}).json()
+
+
+def test_trend_analyze_stream():
+    """测试 NDJSON 流式趋势分析合并后与普通响应一致"""
+    text = "time,glucose\n" + "".join(f"2024-01-{d:02d} {h:02d}:00,{5 + (d + h) % 7}\n" for d in range(1, 4) for h in range(24))
+    expected = client.post("/api/trend/analyze", json={"data": text}).json()
+    res = client.post("/api/trend/analyze/stream", json={"data": text})
+    assert res.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert list(lines[0]) == ["daily"]
+    merged = {}
+    for part in lines:
+        merged.update(part)
+    assert merged == expected
+
+    # 前端以 multipart 文件字段发送 (gzip 压缩) 的结果相同
+    res = client.post("/api/trend/analyze/stream", data={"json": "{}"},
+                      files={"data": ("cgm.csv.gz", gzip.compress(text.encode()), "application/gzip")})
+    assert [json.loads(line) for line in res.text.splitlines()] == lines
+
+    res = client.post("/api/trend/analyze/stream", json={"data": ""})
+    assert len(res.text.splitlines()) == 1 and "error" in res.json()
+
+
+def test_trend_stream_holds_analysis_slot():
+    """测试流式趋势分析在逐段计算期间一直占用分析名额"""
+    from glyconutri import web
+    from glyconutri.trend import TrendAnalysis
+    
+    text = "time,glucose\n" + "".join(f"2024-01-01 {h:02d}:00,{5 + h % 7}\n" for h in range(24))
+    held = []
+    iter_trend = TrendAnalysis.iter_trend
+    
+    def recording_iter_trend(self):
+        for item in iter_trend(self):
+            held.append(web._ANALYSIS_SEM.locked())
+            yield item
+    
+    sem = web._ANALYSIS_SEM
+    web._ANALYSIS_SEM = asyncio.Semaphore(1)
+    TrendAnalysis.iter_trend = recording_iter_trend
+    try:
+        res = client.post("/api/trend/analyze/stream", json={"data": text})
+        assert "error" not in res.text
+        assert held and all(held)
+        assert not web._ANALYSIS_SEM.locked()
+    finally:
+        TrendAnalysis.iter_trend = iter_trend
+        web._ANALYSIS_SEM = sem
+
+
+def test_analysis_concurrency_limit():
+    """测试 CPU 密集端点的并发上限"""
+    import threading
+    import time
+    from glyconutri import web
+    
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+    
+    @web._limit_analysis
+    def work():
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.02)
+        with lock:
+            state["running"] -= 1
+        return True
+    
+    async def burst():
+        web._ANALYSIS_SEM = asyncio.Semaphore(2)
+        return await asyncio.gather(*(work() for _ in range(6)))
+    
+    sem = web._ANALYSIS_SEM
+    try:
+        assert asyncio.run(burst()) == [True] * 6
+    finally:
+        web._ANALYSIS_SEM = sem
+    assert state["peak"] == 2
+
+
+def test_chart_time_series_columnar():
+    """测试图表时序数据为平行数组，与 cgm_data 一致"""
+    text = "time,glucose\n2024-01-01 08:00,5.5\n2024-01-01 08:15,6.04\n"
+    series = client.post("/api/chart/data", json={"data": text}).json()["time_series"]
+    assert series == {"t": [1704096000000, 1704096900000], "g": [99.0, 108.7]}
+    assert series == client.post("/api/cgm/analyze", json={"data": text}).json()["cgm_data"]
+
+
+def test_cgm_upload_chunked():
+    """测试分块上传分析与整体解析结果一致"""
+    text = "time,glucose\n" + "".join(f"2024-01-01 {h:02d}:00,{v}\n" for h, v in enumerate([5.0, 6.5, 8.0, 11.0, 3.5]))
+    res = client.post("/api/cgm/upload", files={"file": ("cgm.csv", text.encode())})
+    data = res.json()
+    assert data["data_points"] == 5
+    assert round(data["results"]["mean_glucose"], 1) == 122.4
+    assert data["results"]["time_below_70"] == 20.0
+
+
+def test_food_info_batch():
+    """测试批量食物信息与单条查询一致"""
+    res = client.post("/api/food/info/batch", json={"foods": [
+        {"name": "米饭", "weight": 150},
+        {"name": "不存在的食物"},
+    ]})
+    results = res.json()["results"]
+    assert results[0] == client.get("/api/food/info", params={"name": "米饭", "weight": 150}).json()
+    assert results[1] == {"error": "未找到"}
+
+
+def test_multipart_cgm_body():
+    """测试 multipart 上传与 JSON 请求体结果一致"""
+    text = "time,glucose\n" + "".join(f"2024-01-01 {i // 4:02d}:{i % 4 * 15:02d},{5 + i % 5 * 0.5}\n" for i in range(20))
+    params = {"sleep_time": "2024-01-01 00:00", "wake_time": "2024-01-01 04:00"}
+    expected = client.post("/api/activity/sleep", json={**params, "cgm_data": text}).json()
+    res = client.post("/api/activity/sleep",
+                      data={"json": json.dumps(params)},
+                      files={"cgm_data": ("cgm.csv", text.encode(), "text/csv")})
+    assert "error" not in expected["metrics"]
+    assert res.json() == expected
+
+    res = client.post("/api/activity/sleep",
+                      data={"json": json.dumps(params)},
+                      files={"cgm_data": ("cgm.csv.gz", gzip.compress(text.encode()), "application/gzip")})
+    assert res.json() == expected
+
+
+def test_cgm_id_reference():
+    """测试按 cgm_id 引用已上传的 CGM 数据"""
+    text = "time,glucose\n" + "".join(f"2024-01-01 {i // 4:02d}:{i % 4 * 15:02d},{5 + i % 5 * 0.5}\n" for i in range(20))
+    cgm_id = client.post("/api/cgm/analyze", json={"data": text}).json()["cgm_id"]
+    params = {"sleep_time": "2024-01-01 00:00", "wake_time": "2024-01-01 04:00"}
+    expected = client.post("/api/activity/sleep", json={**params, "cgm_data": text}).json()
+    assert client.post("/api/activity/sleep", json={**params, "cgm_id": cgm_id}).json() == expected
+    assert client.post("/api/activity/sleep", json={**params, "cgm_id": "missing"}).status_code == 404
+
+
+def test_foods_category_cache_headers():
+    """测试按 GI 类别获取食物的缓存头与 304"""
+    res = client.get("/api/foods/category/低")
+    assert res.status_code == 200
+    assert res.headers["cache-control"] == "public, max-age=86400"
+    assert res.json()["foods"]
+
+    res = client.get("/api/foods/category/低", headers={"If-None-Match": res.headers["etag"]})
+    assert res.status_code == 304
+
+
+def test_foods_search_cache_headers():
+    """测试食物搜索的缓存头与 304"""
+    res = client.get("/api/foods/search", params={"q": "米"})
+    assert res.headers["cache-control"] == "public, max-age=3600"
+    assert any(f["name"] == "米饭" for f in res.json()["results"])
+
+    res = client.get("/api/foods/search", params={"q": "米"}, headers={"If-None-Match": res.headers["etag"]})
+    assert res.status_code == 304
+
+
+def test_cgm_analyze_binary():
+    """测试前端预解析的二进制 CGM 数据与文本解析结果一致"""
+    import numpy as np
+    text = "timestamp,glucose\n" + "".join(f"2024-01-01 {i // 4:02d}:{i % 4 * 15:02d},{5 + i % 5 * 0.5}\n" for i in range(20))
+    times = [1704067200 + i * 900 for i in range(20)]
+    values = [5 + i % 5 * 0.5 for i in range(20)]
+    buffer = np.array(times + values, dtype='<f8').tobytes()
+
+    expected = client.post("/api/cgm/analyze", json={"data": text}).json()
+    res = client.post("/api/cgm/analyze", content=buffer, headers={"Content-Type": "application/octet-stream"}).json()
+    assert res["results"] == expected["results"]
+    assert res["cgm_data"] == expected["cgm_data"]
+
+
+def test_cgm_analyze_streaming():
+    """测试长序列流式返回与普通响应一致"""
+    from glyconutri import web
+    text = "time,glucose\n" + "".join(f"2024-01-01 {i // 4:02d}:{i % 4 * 15:02d},{5 + i % 5 * 0.5}\n" for i in range(20))
+    expected = client.post("/api/cgm/analyze", json={"data": text})
+    
+    threshold = web._STREAM_MIN_POINTS
+    web._STREAM_MIN_POINTS = 0
+    try:
+        res = client.post("/api/cgm/analyze", json={"data": text})
+    finally:
+        web._STREAM_MIN_POINTS = threshold
+    assert res.headers["content-type"] == "application/json"
+    assert res.content == expected.content
+    
+    async def read(response):
+        return b"".join([chunk async for chunk in response.body_iterator])
+    
+    import numpy as np
+    for content in ({"cgm_data": {"t": np.arange(10), "g": np.array([])}},
+                    {"a": 1, "cgm_data": {"t": np.arange(10)}, "b": [2], "c": None}):
+        body = asyncio.run(read(web._streaming_json(content, "cgm_data", chunksize=3)))
+        assert body == web._dumps(content)
+
+
+if __name__ == '__main__':
+    test_home_etag()
+    test_web_import_is_lazy()
+    test_precompressed_static()
+    test_parse_cgm_text_cache()
+    test_analysis_result_cache()
+    test_trend_analyze_stream()
+    test_trend_stream_holds_analysis_slot()
+    test_analysis_concurrency_limit()
+    test_chart_time_series_columnar()
+    test_cgm_upload_chunked()
+    test_food_info_batch()
+    test_multipart_cgm_body()
+    test_cgm_id_reference()
+    test_foods_category_cache_headers()
+    test_foods_search_cache_headers()
+    test_cgm_analyze_binary()
+    test_cgm_analyze_streaming()
+    print("\n所有测试通过! ✓")